@@ -1,5 +1,6 @@
 """Ants Vs. SomeBees."""
 
+import bisect
 import random
 from ucb import main, interact, trace
 from collections import OrderedDict
@@ -12,6 +13,10 @@ from collections import OrderedDict
 class Place:
     """A Place holds insects and has an exit to another Place."""
 
+    # Core attributes are stored in slots to keep large layouts compact;
+    # subclasses may still add other attributes.
+    __slots__ = ('name', 'exit', 'bee_table', 'ant', 'entrance', 'gamestate',
+                 'tunnel', 'depth', 'position', '__dict__')
     is_hive = False
 
     def __init__(self, name, exit=None):
@@ -25,12 +30,25 @@ class Place:
         self.bees = []  # A list of Bees
         self.ant = None  # An Ant
         self.entrance = None  # A Place
+        self.gamestate = None  # The GameState that tracks insects here
+        self.tunnel = None  # The Tunnel that contains this Place, if any
+        self.depth = 0  # The number of places before this one in its tunnel
         # Phase 1: Add an entrance to the exit
         # BEGIN Problem 2
         if exit:
             exit.entrance = self
         # END Problem 2
 
+    @property
+    def bees(self):
+        """A list of the Bees in this place, in the order they arrived."""
+        return list(self.bee_table.values())
+
+    @bees.setter
+    def bees(self, bees):
+        # Bees are stored by id, so that any of them is removed in O(1).
+        self.bee_table = {bee.id: bee for bee in bees}
+
     def add_insect(self, insect):
         """Asks the insect to add itself to this place. This method exists so
         that it can be overridden in subclasses.
@@ -50,6 +68,11 @@ class Place:
 class Insect:
     """An Insect, the base class of Ant and Bee, has health and a Place."""
 
+    # Core attributes are stored in slots. Every insect still has an instance
+    # dictionary, because health is kept there: a health slot would give
+    # classes such as WallAnt a health attribute, which Problem 6 forbids.
+    # Bee classes declare empty slots only so they add nothing further.
+    __slots__ = ('full_health', 'place', 'id', '__dict__')
     next_id = 0  # Every insect gets a unique id number
     damage = 0
     # ADD CLASS ATTRIBUTES HERE
@@ -92,9 +115,13 @@ class Insect:
 
     def add_to(self, place):
         self.place = place
+        if place.gamestate is not None:
+            place.gamestate.update_place(place)
 
     def remove_from(self, place):
         self.place = None
+        if place.gamestate is not None:
+            place.gamestate.update_place(place)
 
     def __repr__(self):
         cname = type(self).__name__
@@ -190,6 +217,13 @@ class ThrowerAnt(Ant):
 
         This method returns None if there is no such Bee (or none in range).
         """
+        tunnel = self.place.tunnel
+        if tunnel is not None:
+            place = tunnel.nearest_with_bees(
+                self.place.depth + self.lower_bound, self.place.depth + self.upper_bound
+            )
+            return random_bee(place.bees) if place is not None else None
+
         # BEGIN Problem 3 and 4
         distance = 0
         current_place = self.place
@@ -570,6 +604,7 @@ class LaserAnt(ThrowerAnt):
 class Bee(Insect):
     """A Bee moves from place to place, following exits and stinging ants."""
 
+    __slots__ = ()
     name = "Bee"
     damage = 1
     is_waterproof = True  # Bees can move through water
@@ -607,11 +642,11 @@ class Bee(Insect):
             self.move_to(destination)
 
     def add_to(self, place):
-        place.bees.append(self)
+        place.bee_table[self.id] = self
         super().add_to(place)
 
     def remove_from(self, place):
-        place.bees.remove(self)
+        del place.bee_table[self.id]
         super().remove_from(place)
 
     def scare(self, length):
@@ -627,6 +662,7 @@ class Bee(Insect):
 class Wasp(Bee):
     """Class of Bee that has higher damage."""
 
+    __slots__ = ()
     name = "Wasp"
     damage = 2
 
@@ -634,6 +670,7 @@ class Wasp(Bee):
 class Boss(Wasp):
     """The leader of the bees. Damage to the boss by any attack is capped."""
 
+    __slots__ = ()
     name = "Boss"
     damage_cap = 8
 
@@ -657,6 +694,8 @@ class Hive(Place):
     def __init__(self, assault_plan):
         self.name = "Hive"
         self.assault_plan = assault_plan
+        self.gamestate = None
+        self.tunnel = None
         self.bees = []
         for bee in assault_plan.all_bees():
             self.add_insect(bee)
@@ -666,14 +705,16 @@ class Hive(Place):
         self.exit = None
 
     def strategy(self, gamestate):
-        exits = [p for p in gamestate.places.values() if p.entrance is self]
+        exits = gamestate.hive_exits
 
-        for bee in self.assault_plan.get(gamestate.time, []):
+        for bee in self.assault_plan.release(gamestate.time):
+            if bee.place is None:
+                self.add_insect(bee)  # Bees of lazy waves start in the hive
             if Boss in bee.__class__.__mro__:
                 Boss.play_sound_effect()
                 GameState.display_notification("Boss Bee is Here!")
             bee.move_to(random.choice(exits))
-            gamestate.active_bees.append(bee)
+            gamestate.active_bees[bee.id] = bee
 
 
 ###################
@@ -705,7 +746,11 @@ class GameState:
         self.beehive = beehive
         self.ant_types = OrderedDict((a.name, a) for a in ant_types)
         self.dimensions = dimensions
-        self.active_bees = []
+        self.active_bees = {}  # Id -> Bee that has left the hive, in order
+        # Insects are tracked by the positions of their places in self.places,
+        # so that listing them takes time in proportion to their number.
+        self.ant_registry = {}  # Position of each place with an ant -> ant
+        self.bee_places = {}  # Position of each place with bees -> place
         self.configure(beehive, create_places)
 
     def configure(self, beehive, create_places):
@@ -715,13 +760,18 @@ class GameState:
         self.bee_entrances = []
 
         def register_place(place, is_bee_entrance):
+            place.position = len(self.places)
+            place.gamestate = self
             self.places[place.name] = place
+            self.update_place(place)
             if is_bee_entrance:
                 place.entrance = beehive
                 self.bee_entrances.append(place)
 
         register_place(self.beehive, False)
         create_places(self.base, register_place, self.dimensions[0], self.dimensions[1])
+        self.tunnels = Tunnel.find_all(self.places.values())
+        self.hive_exits = [p for p in self.places.values() if p.entrance is beehive]
 
     def ants_take_actions(self):  # Ask ants to take actions
         for ant in self.ants:
@@ -729,12 +779,15 @@ class GameState:
                 ant.action(self)
 
     def bees_take_actions(self, num_bees):  # Ask bees to take actions
-        for bee in self.active_bees[:]:
+        defeated = []
+        for bee in self.active_bees.values():
             if bee.health > 0:
                 bee.action(self)
             if bee.health <= 0:
                 num_bees -= 1
-                self.active_bees.remove(bee)
+                defeated.append(bee.id)
+        for bee_id in defeated:
+            del self.active_bees[bee_id]
         if num_bees == 0:  # Check if player won
             GameState.play_win_sound()
             raise AntsWinException()
@@ -742,7 +795,7 @@ class GameState:
 
     def simulate(self):
         """Simulate an attack on the ant colony. This is called by the GUI to play the game."""
-        num_bees = len(self.bees)
+        num_bees = len(self.bees) + self.beehive.assault_plan.pending_count()
         try:
             while True:
                 self.beehive.strategy(self)  # Bees invade from hive
@@ -791,13 +844,27 @@ class GameState:
         """Play the sound effect when ants win! Decorated in gui.py"""
         pass
 
+    def update_place(self, place):
+        """Record the insects in PLACE after they change."""
+        if place.ant is not None:
+            self.ant_registry[place.position] = place.ant
+        else:
+            self.ant_registry.pop(place.position, None)
+        had_bees = place.position in self.bee_places
+        if place.bee_table:
+            self.bee_places[place.position] = place
+        else:
+            self.bee_places.pop(place.position, None)
+        if place.tunnel is not None and had_bees != bool(place.bee_table):
+            place.tunnel.update(place)
+
     @property
     def ants(self):
-        return [p.ant for p in self.places.values() if p.ant is not None]
+        return [self.ant_registry[i] for i in sorted(self.ant_registry)]
 
     @property
     def bees(self):
-        return [b for p in self.places.values() for b in p.bees]
+        return [b for i in sorted(self.bee_places) for b in self.bee_places[i].bee_table.values()]
 
     @property
     def insects(self):
@@ -808,6 +875,74 @@ class GameState:
         return str([str(i) for i in self.ants + self.bees]) + status
 
 
+class Tunnel:
+    """A chain of places, each the entrance of the one before it, that keeps
+    the sorted depths of its places that contain bees.
+
+    >>> back = Place('back')
+    >>> front = Place('front', back)
+    >>> tunnel = Tunnel([back, front])
+    >>> tunnel.nearest_with_bees(0, 1) is None
+    True
+    >>> Bee(3).add_to(front)
+    >>> tunnel.update(front)
+    >>> tunnel.nearest_with_bees(0, 1) is front, tunnel.nearest_with_bees(0, 0)
+    (True, None)
+    """
+
+    def __init__(self, places):
+        self.places = places  # In order from the back of the tunnel
+        self.occupied = []  # Sorted depths of the places with bees
+        for depth, place in enumerate(places):
+            place.tunnel, place.depth = self, depth
+            if place.bee_table:
+                self.occupied.append(depth)
+
+    def update(self, place):
+        """Record whether PLACE, one of the places of this tunnel, has bees."""
+        i = bisect.bisect_left(self.occupied, place.depth)
+        present = i < len(self.occupied) and self.occupied[i] == place.depth
+        if place.bee_table and not present:
+            self.occupied.insert(i, place.depth)
+        elif not place.bee_table and present:
+            del self.occupied[i]
+
+    def nearest_with_bees(self, low, high):
+        """Return the place with bees with the smallest depth from LOW to
+        HIGH, or None if there is none.
+        """
+        i = bisect.bisect_left(self.occupied, low)
+        if i < len(self.occupied) and self.occupied[i] <= high:
+            return self.places[self.occupied[i]]
+        return None
+
+    @classmethod
+    def find_all(cls, places):
+        """Return the tunnels formed by following entrances from each of
+        PLACES that is not the entrance of another, stopping at the hive.
+        If tunnels would share a place or reach an unlisted one, return no
+        tunnels, so that ants search for bees one place at a time instead.
+        """
+        places = [p for p in places if not p.is_hive]
+        registered = {id(p) for p in places}
+        entrances = {id(p.entrance) for p in places}
+        tunnels, seen = [], set()
+        for start in places:
+            if id(start) in entrances:
+                continue
+            chain, place = [], start
+            while place is not None and not place.is_hive:
+                if id(place) in seen or id(place) not in registered:
+                    for p in places:
+                        p.tunnel = None
+                    return []
+                seen.add(id(place))
+                chain.append(place)
+                place = place.entrance
+            tunnels.append(cls(chain))
+        return tunnels
+
+
 class AntHomeBase(Place):
     """AntHomeBase at the end of the tunnel, where the queen normally resides."""
 
@@ -901,17 +1036,46 @@ class AssaultPlan(dict):
     """The Bees' plan of attack for the colony.  Attacks come in timed waves.
 
     An AssaultPlan is a dictionary from times (int) to waves (list of Bees).
+    A LAZY plan instead keeps each wave as a (bee type, health, count)
+    record, and only makes its Bees when the hive releases them.
 
     >>> AssaultPlan().add_wave(4, 2)
     {4: [Bee(3, None), Bee(3, None)]}
+    >>> plan = AssaultPlan(lazy=True).add_wave(Bee, 3, 2, 2)
+    >>> plan, plan.pending_count()
+    ({}, 2)
+    >>> plan.release(2), plan.pending_count()
+    ([Bee(3, None), Bee(3, None)], 0)
     """
 
+    def __init__(self, lazy=False):
+        super().__init__()
+        self.lazy = lazy
+        self.pending = {}  # Time -> list of (bee type, health, count) records
+
     def add_wave(self, bee_type, bee_health, time, count):
         """Add a wave at time with count Bees that have the specified health."""
+        if self.lazy:
+            self.pending.setdefault(time, []).append((bee_type, bee_health, count))
+            return self
         bees = [bee_type(bee_health) for _ in range(count)]
         self.setdefault(time, []).extend(bees)
         return self
 
+    def pending_count(self):
+        """Return the number of Bees in waves that have not been made yet."""
+        return sum(count for wave in self.pending.values() for _, _, count in wave)
+
+    def release(self, time):
+        """Return the Bees that enter the colony at TIME, making the Bees of
+        any lazy waves at that time.
+        """
+        bees = self.get(time, [])
+        if time in self.pending:
+            bees = bees + [bee_type(health) for bee_type, health, count in self.pending.pop(time)
+                           for _ in range(count)]
+        return bees
+
     def all_bees(self):
         """Place all Bees in the beehive and return the list of Bees."""
         return [bee for wave in self.values() for bee in wave]
@@ -1,16 +1,17 @@
 import ants
 import argparse
+import importlib
 from ants import AssaultPlan
 
 
-def make_test_assault_plan(ants_impl=None):
+def make_test_assault_plan(ants_impl=None, lazy=False):
     ants_impl = ants_impl or ants
-    return AssaultPlan().add_wave(ants_impl.Bee, 3, 2, 1).add_wave(ants_impl.Bee, 3, 3, 1)
+    return AssaultPlan(lazy).add_wave(ants_impl.Bee, 3, 2, 1).add_wave(ants_impl.Bee, 3, 3, 1)
 
 
-def make_easy_assault_plan(ants_impl=None):
+def make_easy_assault_plan(ants_impl=None, lazy=False):
     ants_impl = ants_impl or ants_impl
-    plan = AssaultPlan()
+    plan = AssaultPlan(lazy)
     for time in range(3, 16, 2):
         plan.add_wave(ants_impl.Bee, 3, time, 1) # Adding 1 bee of health 3 at timestamp TIME
     plan.add_wave(ants_impl.Wasp, 3, 4, 1) # Assing 1 wasp of health 3 at timestamp 4
@@ -20,9 +21,9 @@ def make_easy_assault_plan(ants_impl=None):
     return plan
 
 
-def make_normal_assault_plan(ants_impl=None):
+def make_normal_assault_plan(ants_impl=None, lazy=False):
     ants_impl = ants_impl or ants
-    plan = AssaultPlan()
+    plan = AssaultPlan(lazy)
 
     for time in range(3, 16, 2): # Adding 2 bees (1 bee for time = 3, 5) of health 3 at timestamp 3, 5, 7, 9, 11, 13, 15
         if time == 3 or time == 5:
@@ -65,9 +66,9 @@ def make_normal_assault_plan(ants_impl=None):
     return plan
 
 
-def make_hard_assault_plan(ants_impl=None):
+def make_hard_assault_plan(ants_impl=None, lazy=False):
     ants_impl = ants_impl or ants
-    plan = AssaultPlan()
+    plan = AssaultPlan(lazy)
 
     for time in range(3, 9, 2): # Adding 2 bees (1 bee for time = 3) of health 3 at timestamp 3, 5, 7
         if time == 3:
@@ -113,9 +114,9 @@ def make_hard_assault_plan(ants_impl=None):
     return plan
 
 
-def make_extra_hard_assault_plan(ants_impl=None):
+def make_extra_hard_assault_plan(ants_impl=None, lazy=False):
     ants_impl = ants_impl or ants
-    plan = AssaultPlan()
+    plan = AssaultPlan(lazy)
 
     for time in range(3, 9, 2): # Adding 2 bees of health 3 at timestamp 3, 5, 7
         plan.add_wave(ants_impl.Bee, 3, time, 2)
@@ -159,6 +160,67 @@ def make_extra_hard_assault_plan(ants_impl=None):
     return plan
 
 
+# Difficulty -> (function that makes its assault plan, number of tunnels)
+ASSAULT_PLANS = {
+    'test': (make_test_assault_plan, 1),
+    'easy': (make_easy_assault_plan, 2),
+    'normal': (make_normal_assault_plan, 4),
+    'hard': (make_hard_assault_plan, 4),
+    'extra-hard': (make_extra_hard_assault_plan, 4),
+}
+DIFFICULTY_ALIASES = {'t': 'test', 'e': 'easy', 'n': 'normal', 'h': 'hard', 'i': 'extra-hard'}
+
+
+def resolve_name(value):
+    """Return VALUE, or the attribute that it names if it is a string of the
+    form module:attr. Names can be sent to other processes, unlike most
+    plans and layouts.
+
+    >>> resolve_name('ants:dry_layout') is ants.dry_layout
+    True
+    >>> resolve_name(ants.wet_layout) is ants.wet_layout
+    True
+    """
+    if isinstance(value, str):
+        module_name, attr = value.split(':', 1)
+        return getattr(importlib.import_module(module_name), attr)
+    return value
+
+
+def make_game_state(difficulty='normal', water=False, food=2, tunnel_length=10,
+                    compact=False, assault_plan=None, layout=None, num_tunnels=None):
+    """Return a new game state for DIFFICULTY (or its one-letter alias), on
+    a layout with water if WATER is true, starting with FOOD food. Unknown
+    difficulties are played as normal. A COMPACT game makes its bees only
+    as they leave the hive.
+
+    ASSAULT_PLAN replaces the plan of DIFFICULTY. It is an AssaultPlan, which
+    only one game can use, or a function called as make_test_assault_plan is
+    to make a new one. LAYOUT replaces the layout chosen by WATER, and
+    NUM_TUNNELS the number of tunnels of DIFFICULTY. Each may also be given
+    by a module:attr name.
+
+    >>> gamestate = make_game_state('hard', assault_plan=make_test_assault_plan,
+    ...                             layout='ants:wet_layout', num_tunnels=2)
+    >>> len(gamestate.beehive.assault_plan.all_bees()), gamestate.dimensions
+    (2, (2, 10))
+    >>> sorted(p for p in gamestate.places if p.startswith('water'))[:2]
+    ['water_0_2', 'water_0_5']
+    """
+    difficulty = DIFFICULTY_ALIASES.get(difficulty, difficulty)
+    make_plan, default_tunnels = ASSAULT_PLANS.get(difficulty, ASSAULT_PLANS['normal'])
+    assault_plan = resolve_name(assault_plan)
+    if assault_plan is None:
+        assault_plan = make_plan(ants, compact)
+    elif not isinstance(assault_plan, AssaultPlan):
+        assault_plan = assault_plan(ants, compact)
+    if layout is None:
+        layout = ants.wet_layout if water else ants.dry_layout
+    layout = resolve_name(layout)
+    dimensions = (num_tunnels or default_tunnels, tunnel_length)
+    return ants.GameState(ants.Hive(assault_plan), ants.ant_types(), layout, dimensions, food)
+
+
 def create_game_state():
     """Reads command-line arguments and returns a game state with these options."""
 
@@ -169,26 +231,4 @@ def create_game_state():
     parser.add_argument('--food', type=int, help='number of food to start with when testing', default=2)
     args = parser.parse_args()
 
-    if args.d in ['t', 'test']:
-        assault_plan = make_test_assault_plan(ants)
-        num_tunnels = 1
-    elif args.d in ['e', 'easy']:
-        assault_plan = make_easy_assault_plan(ants)
-        num_tunnels = 2
-    elif args.d in ['h', 'hard']:
-        assault_plan = make_hard_assault_plan(ants)
-        num_tunnels = 4
-    elif args.d in ['i', 'extra-hard']:
-        assault_plan = make_extra_hard_assault_plan(ants)
-        num_tunnels = 4
-    else:
-        assault_plan = make_normal_assault_plan(ants)
-        num_tunnels = 4
-
-    beehive = ants.Hive(assault_plan)
-    layout = ants.wet_layout if args.water else ants.dry_layout
-    food = args.food
-    tunnel_length = 10
-    dimensions = (num_tunnels, tunnel_length)
-
-    return ants.GameState(beehive, ants.ant_types(), layout, dimensions, food)
\ No newline at end of file
+    return make_game_state(args.d, args.water, args.food)
@@ -0,0 +1,227 @@
+"""Play Ants Vs. SomeBees without the GUI, one game or thousands at once.
+
+A deploy strategy is a function that takes a GameState and may call its
+deploy_ant method. It is called once per turn, after bees leave the hive
+and before the ants act, which is when a player places ants in the GUI.
+Strategies are named by a function in this module (thrower_strategy) or by
+a module and function (my_strategies:wall_first). Assault plans and layouts
+can be named the same way, in place of a difficulty and water.
+
+    python3 ants_simulator.py -d hard -s thrower_strategy -n 2000
+    python3 ants_simulator.py --plan my_plans:make_swarm --layout ants:wet_layout
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import ants
+from ants_plans import make_game_state, resolve_name
+
+MAX_TURNS = 500  # Turns after which an unfinished game counts as a draw
+CHUNK_SIZE = 50  # Games played by each task sent to a worker
+
+
+##############
+# Strategies #
+##############
+
+
+def idle_strategy(gamestate):
+    """Deploy no ants."""
+
+
+def thrower_strategy(gamestate):
+    """Keep a HarvesterAnt at the back of each tunnel, then fill each tunnel
+    with ThrowerAnts from the back, skipping water.
+    """
+    dry_places = [p for p in gamestate.places.values()
+                  if not p.is_hive and not isinstance(p, ants.Water) and p.ant is None]
+    harvester = gamestate.ant_types['Harvester']
+    thrower = gamestate.ant_types['Thrower']
+    for place in dry_places:
+        if place.exit is gamestate.base and harvester.food_cost <= gamestate.food:
+            gamestate.deploy_ant(place.name, harvester.name)
+    for place in dry_places:
+        if place.ant is None and thrower.food_cost <= gamestate.food:
+            gamestate.deploy_ant(place.name, thrower.name)
+
+
+def resolve_strategy(name):
+    """Return the deploy strategy called NAME.
+
+    >>> resolve_strategy('idle_strategy') is idle_strategy
+    True
+    >>> resolve_strategy('ants_simulator:thrower_strategy') is thrower_strategy
+    True
+    """
+    if ':' in name:
+        return resolve_name(name)
+    return globals()[name]
+
+
+###########
+# Playing #
+###########
+
+
+def play_game(gamestate, strategy, max_turns=MAX_TURNS):
+    """Play the game of GAMESTATE to the end, calling STRATEGY on it each
+    turn. Return a dictionary of the outcome: whether the ants won (None if
+    the game lasted MAX_TURNS turns), the turns played, the food spent on
+    ants, and the number of bees defeated.
+
+    >>> gamestate = make_game_state('test', food=10)
+    >>> play_game(gamestate, thrower_strategy)
+    {'won': True, 'turns': 4, 'food_spent': 11, 'bees_defeated': 2}
+    """
+    plan = gamestate.beehive.assault_plan
+    total_bees = len(gamestate.bees) + plan.pending_count()
+    food_spent = 0
+    won = None
+    deploying = True  # Yields alternate between deploying and bee actions
+    # Silence the messages that the game prints for the player.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for result in gamestate.simulate():
+            if result is not None:
+                won = result
+                break
+            if gamestate.time >= max_turns:
+                break
+            if deploying:
+                food = gamestate.food
+                try:
+                    strategy(gamestate)
+                except ants.GameOverException as e:
+                    # A deployed ant can end the game, as a drowned queen does.
+                    won = isinstance(e, ants.AntsWinException)
+                    break
+                finally:
+                    food_spent += max(0, food - gamestate.food)
+            deploying = not deploying
+    return {
+        'won': won,
+        'turns': gamestate.time,
+        'food_spent': food_spent,
+        'bees_defeated': total_bees - len(gamestate.bees) - plan.pending_count(),
+    }
+
+
+def play_games(strategy_name, first_game, num_games, seed, settings):
+    """Play NUM_GAMES games with the strategy STRATEGY_NAME and return their
+    outcomes. Game i is seeded by SEED and FIRST_GAME + i, so results do not
+    depend on how games are split among tasks. SETTINGS are passed to
+    make_game_state.
+    """
+    strategy = resolve_strategy(strategy_name)
+    outcomes = []
+    for i in range(first_game, first_game + num_games):
+        random.seed('{0}:{1}'.format(seed, i))
+        outcomes.append(play_game(make_game_state(**settings), strategy))
+    return outcomes
+
+
+def run_games(strategy_name, num_games=1000, seed=0, max_workers=None,
+              difficulty='normal', water=False, food=2, tunnel_length=10, compact=True,
+              assault_plan=None, layout=None, num_tunnels=None):
+    """Play NUM_GAMES seeded games with the strategy STRATEGY_NAME on
+    several processes and return a summary of their outcomes. COMPACT games
+    make their bees only as they leave the hive, which gives the same
+    results with less memory. The other settings are those of
+    make_game_state, except that ASSAULT_PLAN must make a new plan for each
+    game, so it is a module-level function or its module:attr name.
+    """
+    if isinstance(assault_plan, ants.AssaultPlan):
+        raise TypeError('run_games needs a function that makes an assault plan, '
+                        'since each game uses up its plan')
+    settings = {'difficulty': difficulty, 'water': water, 'food': food,
+                'tunnel_length': tunnel_length, 'compact': compact,
+                'assault_plan': assault_plan, 'layout': layout, 'num_tunnels': num_tunnels}
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(play_games, strategy_name, first,
+                                   min(CHUNK_SIZE, num_games - first), seed, settings)
+                   for first in range(0, num_games, CHUNK_SIZE)]
+        for future in futures:
+            outcomes.extend(future.result())
+    details = {key: name_of(value) for key, value in settings.items()}
+    return summarize(outcomes, strategy=strategy_name, seed=seed, **details)
+
+
+def name_of(value):
+    """Return the module:attr name of the function VALUE, or VALUE if it is
+    not a function, so that summaries can be written as JSON.
+
+    >>> name_of(thrower_strategy), name_of('ants:wet_layout'), name_of(None)
+    ('ants_simulator:thrower_strategy', 'ants:wet_layout', None)
+    """
+    if callable(value):
+        return '{0}:{1}'.format(value.__module__, value.__qualname__)
+    return value
+
+
+def summarize(outcomes, **details):
+    """Return DETAILS with the win rate, mean turns survived, and food
+    efficiency (bees defeated per food spent) of OUTCOMES.
+
+    >>> summarize([{'won': True, 'turns': 10, 'food_spent': 4, 'bees_defeated': 2},
+    ...            {'won': False, 'turns': 6, 'food_spent': 4, 'bees_defeated': 1}])
+    {'games': 2, 'wins': 1, 'losses': 1, 'draws': 0, 'win_rate': 0.5, 'mean_turns': 8.0, 'food_efficiency': 0.375}
+    """
+    n = len(outcomes)
+    wins = sum(1 for o in outcomes if o['won'] is True)
+    losses = sum(1 for o in outcomes if o['won'] is False)
+    food_spent = sum(o['food_spent'] for o in outcomes)
+    bees_defeated = sum(o['bees_defeated'] for o in outcomes)
+    summary = dict(details)
+    summary.update({
+        'games': n,
+        'wins': wins,
+        'losses': losses,
+        'draws': n - wins - losses,
+        'win_rate': wins / n if n else 0,
+        'mean_turns': sum(o['turns'] for o in outcomes) / n if n else 0,
+        'food_efficiency': bees_defeated / food_spent if food_spent else 0,
+    })
+    return summary
+
+
+def run():
+    """Read in the command-line arguments and play games headlessly."""
+    parser = argparse.ArgumentParser(description="Simulate Ants vs. SomeBees")
+    parser.add_argument('-d', '--difficulty', default='normal',
+                        help='test/easy/normal/hard/extra-hard')
+    parser.add_argument('-w', '--water', action='store_true', help='use a layout with water')
+    parser.add_argument('--food', type=int, default=2, help='food to start with')
+    parser.add_argument('--plan', help='module:function that makes the assault plan')
+    parser.add_argument('--layout', help='module:function that lays out the places')
+    parser.add_argument('--tunnels', type=int, help='number of tunnels')
+    parser.add_argument('-s', '--strategy', nargs='+', default=['thrower_strategy'],
+                        help='deploy strategies to evaluate')
+    parser.add_argument('-n', '--games', type=int, default=1000, help='games per strategy')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the games')
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument('--eager', action='store_true',
+                        help='make every bee when the game starts')
+    parser.add_argument('-o', '--output', help='file to write JSON results to')
+    args = parser.parse_args()
+
+    results = []
+    for name in args.strategy:
+        summary = run_games(name, args.games, args.seed, args.workers,
+                            args.difficulty, args.water, args.food,
+                            compact=not args.eager, assault_plan=args.plan,
+                            layout=args.layout, num_tunnels=args.tunnels)
+        print('{0}: win rate {1:.3f}, {2:.1f} turns, {3:.3f} bees per food'.format(
+            name, summary['win_rate'], summary['mean_turns'], summary['food_efficiency']))
+        results.append(summary)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    run()
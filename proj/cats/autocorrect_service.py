@@ -0,0 +1,214 @@
+"""Autocorrect for the typing GUI, run in a pool of worker processes.
+
+Each worker maps the same word cache and deletion index files into memory,
+so the dictionary is loaded once and its pages are shared by every process.
+Requests that arrive together are sent to a worker as one batch, and every
+request has a time budget: a word that cannot be corrected in time is
+returned unchanged rather than holding up the web server.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+
+import cats
+import word_cache
+import word_index
+
+BUDGET = 0.25  # Seconds allowed for correcting one word
+BATCH_SIZE = 32  # Most words sent to a worker at once
+BATCH_WINDOW = 0.002  # Seconds to wait for more words to join a batch
+WORKERS = min(4, os.cpu_count() or 1)
+MEMO_SIZE = 2**16  # final_diff results remembered by each worker
+
+
+class BudgetExceeded(Exception):
+    """Raised when a word takes longer than its budget to correct."""
+
+
+def candidate_words(store, index, word, similarity):
+    """Return the words of STORE to score against WORD: those within
+    SIMILARITY edits in INDEX, with similar letter sets.
+    """
+    if similarity <= index.max_distance:
+        positions = index.candidate_positions(word, similarity)
+    else:
+        positions = None  # Check the letters of every word
+    positions = word_cache.similar_positions(store, word, similarity, positions)
+    return [store[p] for p in positions]
+
+
+def correct_word(word, store, index, diff_functions, similarity, deadline=None):
+    """Return the word in STORE closest to the lowercase WORD, or WORD if
+    none is within SIMILARITY edits or the time DEADLINE passes first.
+    """
+    candidates = candidate_words(store, index, word, similarity)
+    if not candidates:
+        return word
+
+    # Try various diff functions until one doesn't raise an exception.
+    for fn in diff_functions:
+        if deadline is not None:
+            fn = budgeted(fn, deadline)
+        try:
+            return cats.autocorrect(word, candidates, fn, similarity)
+        except BudgetExceeded:
+            return word
+        except BaseException:
+            pass
+    return word
+
+
+def budgeted(diff_function, deadline):
+    """Return DIFF_FUNCTION, but raising BudgetExceeded once the time.time()
+    DEADLINE has passed.
+    """
+    def diff(typed, source, limit):
+        if time.time() > deadline:
+            raise BudgetExceeded()
+        return diff_function(typed, source, limit)
+    return diff
+
+
+##########
+# Worker #
+##########
+
+worker = None  # The (store, index, diff functions, similarity) of a worker
+
+
+def load_worker(words_path, cache_path, index_path, similarity):
+    """Return the state that a worker needs to correct words."""
+    store = word_cache.load_words(words_path, cache_path)
+    index = word_index.load_index(store, words_path, index_path, similarity)
+    diff_functions = [cats.memo_diff(cats.final_diff, MEMO_SIZE),
+                      cats.minimum_mewtations, cats.furry_fixes]
+    return store, index, diff_functions, similarity
+
+
+def start_worker(*args):
+    global worker
+    worker = load_worker(*args)
+
+
+def correct_batch(words, deadlines):
+    """Return the corrections of WORDS, each within its time DEADLINE."""
+    store, index, diff_functions, similarity = worker
+    return [correct_word(word, store, index, diff_functions, similarity, deadline)
+            for word, deadline in zip(words, deadlines)]
+
+
+###########
+# Service #
+###########
+
+
+class AutocorrectService:
+    """Corrects words from the list in WORDS_PATH, using the word cache at
+    CACHE_PATH and the index at INDEX_PATH, in WORKERS processes started
+    with the multiprocessing CONTEXT. With no workers, words are corrected
+    on the calling thread instead. The workers start with the first
+    correction, so importing a module that creates a service is safe in
+    worker processes, which re-import the main module when they are spawned.
+
+    >>> spawn = multiprocessing.get_context('spawn')
+    >>> service = AutocorrectService('data/words.txt', 'data/words.cache',
+    ...                              'data/words.index', 2, workers=1, budget=60,
+    ...                              context=spawn)
+    >>> service.correct('helo'), service.correct('wrod')
+    ('help', 'wood')
+    >>> service.executor is not None
+    True
+    """
+
+    def __init__(self, words_path, cache_path, index_path, similarity,
+                 workers=WORKERS, budget=BUDGET, context=None):
+        self.paths = (words_path, cache_path, index_path)
+        self.similarity = similarity
+        self.workers = workers
+        self.budget = budget
+        self.context = context
+        self.requests = queue.Queue()  # (word, deadline, future) to batch
+        self.executor = None
+        self.local = None  # Worker state used when there are no workers
+        self.lock = threading.Lock()
+        self.timeouts = 0  # Words returned unchanged because of the budget
+
+    def start(self):
+        """Start the worker processes and the thread that batches requests.
+        Worker processes never start workers of their own.
+        """
+        with self.lock:
+            if self.executor is not None or self.local is not None:
+                return
+            # A spawned worker has no parent process yet while it imports the
+            # main module, but it already has its own name.
+            if self.workers and multiprocessing.current_process().name == 'MainProcess':
+                self.executor = ProcessPoolExecutor(
+                    self.workers, mp_context=self.context, initializer=start_worker,
+                    initargs=self.paths + (self.similarity,),
+                )
+                self.executor.submit(os.getpid)  # Start the workers now
+                threading.Thread(target=self._dispatch, daemon=True).start()
+            else:
+                self.local = load_worker(*self.paths, self.similarity)
+
+    def correct(self, word):
+        """Return the correction of the lowercase WORD, or WORD itself if it
+        cannot be corrected within the budget.
+        """
+        self.start()
+        deadline = time.time() + self.budget
+        if self.local is not None:
+            store, index, diff_functions, similarity = self.local
+            guess = correct_word(word, store, index, diff_functions, similarity, deadline)
+        else:
+            future = Future()
+            self.requests.put((word, deadline, future))
+            try:
+                guess = future.result(timeout=self.budget)
+            except TimeoutError:
+                guess = word
+        if guess == word and time.time() > deadline:
+            with self.lock:
+                self.timeouts += 1
+        return guess
+
+    def _dispatch(self):
+        while True:
+            batch = [self.requests.get()]
+            end = time.time() + BATCH_WINDOW
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.requests.get(timeout=max(0, end - time.time())))
+                except queue.Empty:
+                    break
+            try:
+                self._submit(batch)
+            except Exception:
+                traceback.print_exc()
+                for word, _, future in batch:
+                    future.set_result(word)
+
+    def _submit(self, batch):
+        # Correct each distinct word once, within the latest of its deadlines.
+        deadlines = {}
+        for word, deadline, _ in batch:
+            deadlines[word] = max(deadline, deadlines.get(word, 0))
+        words = list(deadlines)
+        job = self.executor.submit(correct_batch, words, [deadlines[w] for w in words])
+
+        def finish(job):
+            try:
+                guesses = dict(zip(words, job.result()))
+            except Exception:
+                traceback.print_exc()
+                guesses = {}
+            for word, _, future in batch:
+                future.set_result(guesses.get(word, word))
+
+        job.add_done_callback(finish)
@@ -9,8 +9,10 @@ from utils import (
     deep_convert_to_tuple,
 )
 from ucb import main, interact, trace
+from collections import OrderedDict
 from datetime import datetime
 import random
+import threading
 
 
 ###########
@@ -161,15 +163,76 @@ def memo(f):
     return memoized
 
 
-def memo_diff(diff_function):
-    """A memoization function."""
-    cache = {}
+MEMO_DIFF_SIZE = 2**17  # Default number of results remembered by memo_diff
+
+
+def memo_diff(diff_function, size=MEMO_DIFF_SIZE):
+    """A memoization function for diff functions that remembers the results
+    for the SIZE most recently used (typed, source) pairs, or for every pair
+    if SIZE is None. A result computed with some limit also answers calls
+    with smaller limits. It is safe to call from several threads. Like
+    count, the memoized function's call_count is the number of times that
+    DIFF_FUNCTION itself was called.
+
+    >>> diff = memo_diff(lambda typed, source, limit: print('called') or 2, size=1)
+    >>> diff('cat', 'dog', 5)
+    called
+    2
+    >>> diff('cat', 'dog', 1)
+    2
+    >>> diff('cow', 'dog', 5)
+    called
+    2
+    >>> diff('cat', 'dog', 5)
+    called
+    2
+    >>> diff.cache_info(), diff.call_count
+    ({'hits': 1, 'misses': 3, 'size': 1, 'maxsize': 1}, 3)
+    >>> diff.cache_clear()
+    >>> diff.cache_info()
+    {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 1}
+    """
+    cache = OrderedDict()  # (typed, source) -> (result, limit)
+    lock = threading.Lock()
 
     def memoized(typed, source, limit):
         # BEGIN PROBLEM EC
-        "*** YOUR CODE HERE ***"
+        key = (typed, source)
+        with lock:
+            if key in cache:
+                result, cached_limit = cache[key]
+                # A result within its limit is exact; otherwise it only shows
+                # that the difference exceeds cached_limit.
+                if result <= cached_limit or limit <= cached_limit:
+                    cache.move_to_end(key)
+                    memoized.hits += 1
+                    return result
+            memoized.misses += 1
+            memoized.call_count += 1
+        result = diff_function(typed, source, limit)
+        with lock:
+            if key not in cache or cache[key][1] < limit:
+                cache[key] = (result, limit)
+            cache.move_to_end(key)
+            if size is not None and len(cache) > size:
+                cache.popitem(last=False)
+        return result
         # END PROBLEM EC
 
+    def cache_info():
+        """Return the hit and miss counts and the current and maximum size."""
+        return {"hits": memoized.hits, "misses": memoized.misses,
+                "size": len(cache), "maxsize": size}
+
+    def cache_clear():
+        """Forget every result and reset the hit and miss counts."""
+        with lock:
+            cache.clear()
+            memoized.hits = memoized.misses = 0
+
+    memoized.hits = memoized.misses = memoized.call_count = 0
+    memoized.cache_info = cache_info
+    memoized.cache_clear = cache_clear
     return memoized
 
 
@@ -271,6 +334,8 @@ def minimum_mewtations(typed, source, limit):
         # END
     if typed == source:
         return 0
+    if abs(len(typed) - len(source)) > limit:  # Needs more than LIMIT edits
+        return limit + 1
     if not typed or not source:
         return max(len(typed), len(source))
     # Recursive cases should go below here
@@ -293,12 +358,54 @@ def minimum_mewtations(typed, source, limit):
 
 # Ignore the line below
 minimum_mewtations = count(minimum_mewtations)
+minimum_mewtations = memo_diff(minimum_mewtations, size=None)
+
+
+def banded_mewtations(typed, source, limit):
+    """An iterative diff function that returns the same edit distance as
+    minimum_mewtations when it is at most LIMIT, and LIMIT + 1 otherwise.
+
+    Only cells of the edit distance table within LIMIT of the diagonal are
+    computed, and the computation stops as soon as a whole row exceeds LIMIT.
+
+    >>> banded_mewtations("ckiteus", "kittens", 10)
+    3
+    >>> banded_mewtations("ckiteus", "kittens", 2)
+    3
+    >>> banded_mewtations("cat", "catalog", 3)
+    4
+    """
+    too_far = limit + 1
+    if limit < 0 or abs(len(typed) - len(source)) > limit:
+        return too_far
+    # previous[j] is the distance from the typed prefix so far to source[:j].
+    previous = [j if j <= limit else too_far for j in range(len(source) + 1)]
+    for i in range(1, len(typed) + 1):
+        current = [too_far] * (len(source) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        letter = typed[i - 1]
+        for j in range(max(1, i - limit), min(len(source), i + limit) + 1):
+            if letter == source[j - 1]:
+                distance = previous[j - 1]
+            else:
+                distance = 1 + min(previous[j - 1], previous[j], current[j - 1])
+            if distance > too_far:
+                distance = too_far
+            current[j] = distance
+            if distance < row_min:
+                row_min = distance
+        if row_min > limit:
+            return too_far
+        previous = current
+    return previous[-1]
 
 
 def final_diff(typed, source, limit):
     """A diff function that takes in a string TYPED, a string SOURCE, and a number LIMIT.
     If you implement this function, it will be used."""
-    assert False, "Remove this line to use your final_diff function."
+    return banded_mewtations(typed, source, limit)
 
 
 FINAL_DIFF_LIMIT = 6  # REPLACE THIS WITH YOUR LIMIT
@@ -1,10 +1,19 @@
 """Web server for the typing GUI."""
 import base64
+import multiprocessing
 import os
 import random
 import string
+import threading
+from collections import OrderedDict
 
+import autocorrect_service
 import cats
+import match_analysis
+import paragraph_store
+import typing_session
+import word_cache
+import word_index
 from gui_files.common_server import Server, route, sendto, start
 from multiplayer import multiplayer
 
@@ -12,34 +21,74 @@ PORT = 31415
 DEFAULT_SERVER = "https://cats.cs61a.org"
 GUI_FOLDER = "gui_files/"
 PARAGRAPH_PATH = "./data/sample_paragraphs.txt"
-WORDS_LIST = cats.lines_from_file("data/words.txt")
-WORDS_SET = set(WORDS_LIST)
-LETTER_SETS = [(w, set(w)) for w in WORDS_LIST]
+PARAGRAPHS = paragraph_store.ParagraphStore.from_file(PARAGRAPH_PATH)
+WORDS_PATH = "data/words.txt"
+WORDS_CACHE_PATH = "data/words.cache"
+WORDS_INDEX_PATH = "data/words.index"
+# A memory-mapped sequence of the words that also supports fast `in` tests.
+WORDS_LIST = word_cache.load_words(WORDS_PATH, WORDS_CACHE_PATH)
 SIMILARITY_LIMIT = 2
+# Built here, if needed, so that autocorrect workers only map the saved index.
+WORDS_INDEX = word_index.load_index(WORDS_LIST, WORDS_PATH, WORDS_INDEX_PATH, SIMILARITY_LIMIT)
+# Correct words in worker processes that share the word cache and index, so
+# that a slow correction does not hold up other requests. The workers start
+# with the server below, since a spawned worker re-imports this module.
+AUTOCORRECT_WORKERS = autocorrect_service.WORKERS
+AUTOCORRECT = autocorrect_service.AutocorrectService(
+    WORDS_PATH, WORDS_CACHE_PATH, WORDS_INDEX_PATH, SIMILARITY_LIMIT, AUTOCORRECT_WORKERS
+)
+TYPING_SESSION_COUNT = 256  # Typing sessions kept, for one prompt per client
+TYPING_SESSIONS = OrderedDict()  # (client id, prompted text) -> TypingSession
+TYPING_SESSIONS_LOCK = threading.Lock()
 
 
 @route
 def request_paragraph(topics=None):
     """Return a random paragraph."""
-    paragraphs = cats.lines_from_file(PARAGRAPH_PATH)
-    random.shuffle(paragraphs)
-    select = cats.about(topics) if topics else lambda x: True
-    return cats.pick(paragraphs, select, 0)
+    return PARAGRAPHS.random_paragraph(topics)
 
 
 @route
-def analyze(prompted_text, typed_text, start_time, end_time):
-    """Return [wpm, accuracy]."""
-    return {
-        "wpm": cats.wpm(typed_text, end_time - start_time),
-        "accuracy": cats.accuracy(typed_text, prompted_text),
-    }
+def analyze(prompted_text, typed_text, start_time, end_time, id=None):
+    """Return [wpm, accuracy] of the text typed by the client ID."""
+    session = typing_session_for(id, prompted_text)
+    with session.lock:
+        session.update(typed_text)
+        return session_stats(session, start_time, end_time)
 
 
-def similar(w, v, n):
-    """Whether W intersect V contains at least |W|-N and |V|-N elements."""
-    intersect = len(w.intersection(v))
-    return intersect >= len(w) - n and intersect >= len(v) - n
+@route
+def analyze_keystroke(prompted_text, position, removed, inserted, start_time, end_time,
+                      id=None):
+    """Return [wpm, accuracy] after replacing REMOVED characters at POSITION
+    of the text typed so far by the client ID with INSERTED.
+    """
+    session = typing_session_for(id, prompted_text)
+    with session.lock:
+        session.edit(position, removed, inserted)
+        return session_stats(session, start_time, end_time)
+
+
+def typing_session_for(id, prompted_text):
+    """Return the typing session of the client ID for PROMPTED_TEXT, creating
+    it if needed.
+    """
+    key = (id, prompted_text)
+    with TYPING_SESSIONS_LOCK:
+        if key in TYPING_SESSIONS:
+            TYPING_SESSIONS.move_to_end(key)
+        else:
+            TYPING_SESSIONS[key] = typing_session.TypingSession(prompted_text)
+            if len(TYPING_SESSIONS) > TYPING_SESSION_COUNT:
+                TYPING_SESSIONS.popitem(last=False)
+        return TYPING_SESSIONS[key]
+
+
+def session_stats(session, start_time, end_time):
+    return {
+        "wpm": session.wpm(end_time - start_time),
+        "accuracy": session.accuracy(),
+    }
 
 
 @route
@@ -47,22 +96,10 @@ def autocorrect(word=""):
     """Call autocorrect using the best score function available."""
     raw_word = word
     word = cats.lower(cats.remove_punctuation(raw_word))
-    if word in WORDS_SET or word == "":
+    if word in WORDS_LIST or word == "":
         return raw_word
 
-    # Heuristically choose candidate words to score.
-    letters = set(word)
-    candidates = [w for w, s in LETTER_SETS if similar(s, letters, SIMILARITY_LIMIT)]
-
-    # Try various diff functions until one doesn't raise an exception.
-    for fn in [cats.final_diff, cats.minimum_mewtations, cats.furry_fixes]:
-        try:
-            guess = cats.autocorrect(word, candidates, fn, SIMILARITY_LIMIT)
-            return reformat(guess, raw_word)
-        except BaseException:
-            pass
-
-    return raw_word
+    return reformat(AUTOCORRECT.correct(word), raw_word)
 
 
 def reformat(word, raw_word):
@@ -113,10 +150,8 @@ def fastest_words(prompt, targets):
     """Return a list of word_speed values describing the match."""
     words = prompt.split()
     progress = Server.request_all_progress(targets=targets)
-    start_times = [p[0][1] for p in progress]
-    times_per_player = [[p[1] - s for p in ps] for s, ps in zip(start_times, progress)]
-    match = cats.time_per_word(words, times_per_player)
-    return cats.fastest_words(match)
+    timestamps_per_player = [[p[1] for p in ps] for ps in progress]
+    return match_analysis.fastest_words(words, timestamps_per_player)
 
 
 multiplayer.create_multiplayer_server()
@@ -138,5 +173,8 @@ def favicon():
     return "data:image/png;base64," + image_b64
 
 
-if __name__ == "__main__" or os.environ.get("ENV") == "prod":
-    app = start(PORT, DEFAULT_SERVER, GUI_FOLDER, multiplayer.db_init)
\ No newline at end of file
+if multiprocessing.current_process().name == "MainProcess" and (
+    __name__ == "__main__" or os.environ.get("ENV") == "prod"
+):
+    AUTOCORRECT.start()  # Before other threads start, since workers may be forked
+    app = start(PORT, DEFAULT_SERVER, GUI_FOLDER, multiplayer.server_init)
\ No newline at end of file
@@ -0,0 +1,120 @@
+"""An in-process copy of the top of the leaderboard table."""
+
+import bisect
+import threading
+
+LEADERBOARD_SIZE = 20
+
+
+class Leaderboard:
+    """The LEADERBOARD_SIZE best [name, user_id, wpm] rows of the leaderboard
+    table, sorted by decreasing wpm. CONNECT_DB returns a context manager
+    for the database, as common.db.connect_db does. Rows are read from the
+    database once and then kept up to date by writing through this object.
+    User ids are compared as strings, since the table stores them as text.
+
+    >>> import sqlite3
+    >>> from contextlib import contextmanager
+    >>> connection = sqlite3.connect(':memory:')
+    >>> _ = connection.execute('CREATE TABLE leaderboard (name varchar(128), '
+    ...                        'user_id varchar(128), wpm double, PRIMARY KEY (user_id))')
+    >>> @contextmanager
+    ... def connect_db():
+    ...     with connection:
+    ...         yield lambda query, args=(): connection.execute(query.replace('%s', '?'), args)
+    >>> board = Leaderboard(connect_db, size=2)
+    >>> board.record('Ann', 1, 80.0)
+    >>> board.record('Bo', 2, 60.0)
+    >>> board.top(), board.threshold(3), board.threshold(1)
+    ([['Ann', 80.0], ['Bo', 60.0]], 60.0, 80.0)
+    >>> board.record('Cy', 3, 70.0)
+    >>> board.top(), board.contains(2), board.contains('3')
+    ([['Ann', 80.0], ['Cy', 70.0]], False, True)
+    >>> board.rename(3, 'Cyd')
+    >>> board.record('Ann', 1, 50.0)
+    >>> board.top()
+    [['Cyd', 70.0], ['Bo', 60.0]]
+    >>> Leaderboard(connect_db, size=2).top() == board.top()
+    True
+    >>> connection.execute('SELECT name, user_id, wpm FROM leaderboard ORDER BY wpm DESC').fetchall()
+    [('Cyd', '3', 70.0), ('Bo', '2', 60.0), ('Ann', '1', 50.0)]
+    """
+
+    def __init__(self, connect_db, size=LEADERBOARD_SIZE):
+        self.connect_db = connect_db
+        self.size = size
+        self.rows = None  # Loaded on first use
+        self.lock = threading.Lock()
+
+    def _load(self):
+        if self.rows is None:
+            with self.connect_db() as db:
+                self.rows = [
+                    [name, str(user_id), wpm]
+                    for name, user_id, wpm in db(
+                        "SELECT name, user_id, wpm FROM leaderboard ORDER BY wpm DESC LIMIT %s",
+                        [self.size],
+                    ).fetchall()
+                ]
+        return self.rows
+
+    def top(self):
+        """Return a [name, wpm] pair for each row, best first."""
+        with self.lock:
+            return [[name, wpm] for name, _, wpm in self._load()]
+
+    def contains(self, user):
+        """Return whether USER has one of the rows."""
+        with self.lock:
+            return any(user_id == str(user) for _, user_id, _ in self._load())
+
+    def threshold(self, user):
+        """Return the wpm that USER must reach to improve their place: the
+        lowest wpm on a full leaderboard, or their own best if higher.
+        """
+        with self.lock:
+            rows = self._load()
+            threshold = rows[-1][2] if len(rows) >= self.size else 0
+            # A user missing from a full leaderboard has a best below its
+            # threshold, and every user has a row on one that is not full.
+            for _, user_id, wpm in rows:
+                if user_id == str(user):
+                    threshold = max(threshold, wpm)
+            return threshold
+
+    def record(self, name, user, wpm):
+        """Store NAME and WPM as the row of USER."""
+        with self.lock:
+            with self.connect_db() as db:
+                db(
+                    "REPLACE INTO leaderboard (name, user_id, wpm) VALUES (%s, %s, %s)",
+                    [name, user, wpm],
+                )
+            if self.rows is None:
+                return
+            # Rows below a full leaderboard are only in the database.
+            full = len(self.rows) >= self.size
+            lowest = self.rows[-1][2] if full else 0
+            removed = self._remove(user)
+            if not full or wpm > lowest:
+                keys = [-row[2] for row in self.rows]
+                self.rows.insert(bisect.bisect_right(keys, -wpm), [name, str(user), wpm])
+                del self.rows[self.size:]
+            elif removed:
+                self.rows = None  # Reload to find the row that moves up.
+
+    def rename(self, user, new_name):
+        """Change the name in the row of USER to NEW_NAME."""
+        with self.lock:
+            with self.connect_db() as db:
+                db("UPDATE leaderboard SET name=(%s) WHERE user_id=(%s)", [new_name, user])
+            for row in self.rows or []:
+                if row[1] == str(user):
+                    row[0] = new_name
+
+    def _remove(self, user):
+        for i, row in enumerate(self.rows):
+            if row[1] == str(user):
+                del self.rows[i]
+                return True
+        return False
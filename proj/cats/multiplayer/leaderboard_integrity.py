@@ -2,10 +2,12 @@ import base64
 import json
 import os
 import random
+import threading
 import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from functools import wraps
-from queue import Queue
-from threading import Thread
+from queue import Empty, Queue
 
 import cats
 
@@ -15,8 +17,12 @@ COMMON_WORDS_SET = set(cats.lines_from_file("data/common_words.txt"))
 CAPTCHA_QUEUE_LEN = 200
 CAPTCHA_LENGTH = 10
 CAPTCHA_WORD_LEN = 10
+CAPTCHA_WORKERS = 2  # Number of captchas generated at the same time
+CAPTCHA_USE_PROCESSES = False  # Whether workers render in separate processes
+CAPTCHA_RETRY_DELAY = 5  # Seconds a worker waits after failing to render
+CAPTCHA_WAIT = 0.5  # Seconds to wait for queued captchas before rendering them
 
-captcha_queue = Queue()
+CAPTCHA_WORDS = sorted(x for x in COMMON_WORDS_SET if len(x) < CAPTCHA_WORD_LEN)
 
 
 def require_fernet(f):
@@ -93,27 +99,126 @@ def decode_challenge(token):
     return token["user"], token["words"], token["startTime"]
 
 
-def populate_captcha_queue():
-    while captcha_queue.qsize() < CAPTCHA_QUEUE_LEN:
-        captcha_queue.put(generate_captcha())
-
-
-def generate_captcha():
+def render_captcha(word):
+    """Return a PNG image of WORD as bytes."""
     from claptcha import Claptcha
 
-    word = random.choice([x for x in COMMON_WORDS_SET if len(x) < CAPTCHA_WORD_LEN])
     c = Claptcha(word, "multiplayer/FreeMono.ttf", margin=(20, 10))
-    image_b64 = base64.b64encode(c.bytes[1].getvalue()).decode("utf-8")
-    return "data:image/png;base64," + image_b64, word
+    return c.bytes[1].getvalue()
 
 
-def get_captcha_urls(num_words=CAPTCHA_LENGTH):
-    Thread(target=populate_captcha_queue).start()
+def image_url(png):
+    """Return a data URL for the PNG image bytes PNG."""
+    return "data:image/png;base64," + base64.b64encode(png).decode("utf-8")
+
 
+def generate_captcha():
+    word = random.choice(CAPTCHA_WORDS)
+    return image_url(render_captcha(word)), word
+
+
+class CaptchaPool:
+    """A queue of up to SIZE (png bytes, word) captchas that WORKERS
+    long-lived threads keep full, rendering in a process pool if
+    USE_PROCESSES is true. Each captcha is handed out once. When the queue
+    runs dry, the missing captchas are rendered on the calling thread.
+    """
+
+    def __init__(self, size=CAPTCHA_QUEUE_LEN, workers=CAPTCHA_WORKERS,
+                 use_processes=CAPTCHA_USE_PROCESSES):
+        self.queue = Queue(maxsize=size)
+        self.workers = workers
+        self.use_processes = use_processes
+        self.lock = threading.Lock()
+        self.started = False
+        self.unavailable = False  # Whether captchas cannot be rendered at all
+        self.generated = 0
+        self.inline = 0  # Captchas rendered by take because the queue was empty
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+
+    def start(self):
+        """Start the workers, unless they are already running."""
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        executor = ProcessPoolExecutor(self.workers) if self.use_processes else None
+        for _ in range(self.workers):
+            threading.Thread(target=self._work, args=(executor,), daemon=True).start()
+
+    def _work(self, executor):
+        while True:
+            try:
+                self.queue.put(self._generate(executor))
+            except ImportError:
+                # Retrying cannot install a missing library, so stop.
+                with self.lock:
+                    first = not self.unavailable
+                    self.unavailable = True
+                if first:
+                    traceback.print_exc()
+                return
+            except Exception:
+                traceback.print_exc()
+                time.sleep(CAPTCHA_RETRY_DELAY)
+
+    def _generate(self, executor=None, exclude=()):
+        word = random.choice(CAPTCHA_WORDS)
+        while word in exclude:
+            word = random.choice(CAPTCHA_WORDS)
+        start = time.perf_counter()
+        if executor is None:
+            png = render_captcha(word)
+        else:
+            png = executor.submit(render_captcha, word).result()
+        latency = time.perf_counter() - start
+        with self.lock:
+            self.generated += 1
+            self.total_latency += latency
+            self.last_latency = latency
+        return png, word
+
+    def take(self, count):
+        """Return a list of COUNT (png bytes, word) captchas with distinct
+        words, waiting up to CAPTCHA_WAIT seconds in all for queued ones.
+        """
+        self.start()
+        captchas, words = [], set()
+        # Workers that stopped on an ImportError will not fill the queue.
+        deadline = time.monotonic() + (0 if self.unavailable else CAPTCHA_WAIT)
+        while len(captchas) < count:
+            try:
+                captcha = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+            except Empty:
+                captcha = self._generate(exclude=words)
+                with self.lock:
+                    self.inline += 1
+            if captcha[1] not in words:  # Queued captchas may repeat a word.
+                captchas.append(captcha)
+                words.add(captcha[1])
+        return captchas
+
+    def stats(self):
+        """Return the queue depth and generation statistics."""
+        with self.lock:
+            mean = self.total_latency / self.generated if self.generated else 0.0
+            return {
+                "depth": self.queue.qsize(),
+                "generated": self.generated,
+                "inline": self.inline,
+                "meanLatency": mean,
+                "lastLatency": self.last_latency,
+            }
+
+
+captcha_pool = CaptchaPool()
+
+
+def get_captcha_urls(num_words=CAPTCHA_LENGTH):
     images, words = [], []
-    for _ in range(num_words):
-        image, word = captcha_queue.get()
-        images.append(image)
+    for png, word in captcha_pool.take(num_words):
+        images.append(image_url(png))
         words.append(word)
 
     return images, words
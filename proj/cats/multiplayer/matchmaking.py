@@ -0,0 +1,123 @@
+"""A matchmaking queue that forms multiplayer games as players arrive."""
+
+import heapq
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from itertools import islice
+
+TICK_INTERVAL = 0.25  # Seconds between background checks for new games
+
+
+class Matchmaker:
+    """A queue of players waiting for a game. START_GAME is called with a
+    list of players whenever MAX_PLAYERS are waiting, or MIN_PLAYERS are
+    waiting and the first of them joined at least MAX_WAIT seconds ago.
+    A player who has not been seen for QUEUE_TIMEOUT seconds leaves the
+    queue. Players may wait for a match instead of polling repeatedly.
+    Players for whom IS_PLAYING returns true are already in a game and are
+    not queued. It is called, like START_GAME, while the queue is locked,
+    so a game that START_GAME records is seen by every later request.
+
+    >>> games = []
+    >>> playing = lambda player: any(player in game for game in games)
+    >>> matchmaker = Matchmaker(games.append, 2, 3, queue_timeout=1, max_wait=5,
+    ...                         is_playing=playing)
+    >>> matchmaker.request('a'), matchmaker.request('b')
+    ((False, 1), (False, 2))
+    >>> matchmaker.request('c')
+    (True, 0)
+    >>> games
+    [['a', 'b', 'c']]
+    >>> matchmaker.request('a'), matchmaker.request('d')
+    ((True, 0), (False, 1))
+    """
+
+    def __init__(self, start_game, min_players, max_players, queue_timeout, max_wait,
+                 clock=time.monotonic, is_playing=lambda player: False):
+        self.start_game = start_game
+        self.min_players = min_players
+        self.max_players = max_players
+        self.queue_timeout = queue_timeout
+        self.max_wait = max_wait
+        self.clock = clock
+        self.is_playing = is_playing
+        self.last_seen = OrderedDict()  # Waiting player -> last seen, in join order
+        self.join_times = {}  # Waiting player -> time joined
+        self.seen_heap = []  # (last seen, player), including outdated entries
+        self.condition = threading.Condition()
+        self.ticking = False  # Whether the background thread has started
+
+    def request(self, player, wait=0):
+        """Add PLAYER to the queue or mark them as seen, and wait up to WAIT
+        seconds for them to be matched. Return whether they were matched (or
+        are already playing) and how many players are waiting.
+        """
+        with self.condition:
+            if self.is_playing(player):
+                return True, len(self.last_seen)
+            now = self.clock()
+            deadline = now + wait
+            if player not in self.last_seen:
+                self.join_times[player] = now
+            # A waiting player is present until the wait ends.
+            self.last_seen[player] = deadline
+            heapq.heappush(self.seen_heap, (deadline, player))
+            self._update(now)
+            while player in self.last_seen:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return player not in self.last_seen, len(self.last_seen)
+
+    def tick(self):
+        """Remove players who left and start any games that are ready."""
+        with self.condition:
+            self._update(self.clock())
+
+    def start(self, interval=TICK_INTERVAL):
+        """Call tick every INTERVAL seconds in a background thread, unless
+        it is already running.
+        """
+        with self.condition:
+            if self.ticking:
+                return
+            self.ticking = True
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.tick()
+                except Exception:
+                    traceback.print_exc()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _update(self, now):
+        while self.seen_heap and now - self.seen_heap[0][0] > self.queue_timeout:
+            seen, player = heapq.heappop(self.seen_heap)
+            if self.last_seen.get(player) == seen:
+                del self.last_seen[player]
+                del self.join_times[player]
+
+        started = False
+        while self._ready(now):
+            players = list(islice(self.last_seen, self.max_players))
+            for player in players:
+                del self.last_seen[player]
+                del self.join_times[player]
+            self.start_game(players)
+            started = True
+        if started:
+            self.condition.notify_all()
+
+    def _ready(self, now):
+        if len(self.last_seen) >= self.max_players:
+            return True
+        if len(self.last_seen) < self.min_players:
+            return False
+        first_player = next(iter(self.last_seen))
+        return now - self.join_times[first_player] >= self.max_wait
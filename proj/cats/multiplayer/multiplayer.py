@@ -1,22 +1,27 @@
 import time
-from collections import namedtuple, defaultdict
-from datetime import datetime, timedelta
+from collections import namedtuple
+from datetime import timedelta
 from random import randrange
 
 import cats
 from gui_files.common_server import route, forward_to_server, server_only
 from .leaderboard_integrity import (
+    captcha_pool,
     get_authorized_limit,
     get_captcha_urls,
     encode_challenge,
     decode_challenge,
     create_wpm_authorization,
 )
+from .leaderboard import Leaderboard
+from .matchmaking import Matchmaker
+from .sessions import GameSessions
 
 MIN_PLAYERS = 2
 MAX_PLAYERS = 4
 QUEUE_TIMEOUT = timedelta(seconds=1)
 MAX_WAIT = timedelta(seconds=5)
+MAX_MATCH_WAIT = 30  # Longest a request_match call may block, in seconds
 
 MAX_NAME_LENGTH = 90
 
@@ -28,6 +33,7 @@ CAPTCHA_SLOWDOWN_FACTOR = 0.8
 def db_init():
     global connect_db
     from common.db import connect_db
+    from sqlalchemy.exc import OperationalError
 
     with connect_db() as db:
         db(
@@ -38,11 +44,45 @@ def db_init():
         PRIMARY KEY (`user_id`)
     );"""
         )
+    # MySQL has no CREATE INDEX IF NOT EXISTS, so an existing index is an error.
+    try:
+        with connect_db() as db:
+            db("CREATE INDEX leaderboard_wpm ON leaderboard (wpm)")
+    except OperationalError as e:
+        if "leaderboard_wpm" not in str(e):
+            raise
+
+
+def server_init():
+    """Prepare this process to serve multiplayer games: set up the database
+    and start rendering captchas, which clients never do.
+    """
+    db_init()
+    captcha_pool.start()
 
 
 def create_multiplayer_server():
-    State = namedtuple("State", ["queue", "game_lookup", "game_data", "progress"])
-    State = State({}, {}, {}, defaultdict(list))
+    def start_game(players):
+        import cats_gui
+
+        State.games.create_game(
+            cats_gui.request_id(), cats_gui.request_paragraph(), players
+        )
+
+    State = namedtuple("State", ["matchmaker", "games", "leaderboard"])
+    games = GameSessions()
+    State = State(
+        Matchmaker(
+            start_game,
+            MIN_PLAYERS,
+            MAX_PLAYERS,
+            QUEUE_TIMEOUT.total_seconds(),
+            MAX_WAIT.total_seconds(),
+            is_playing=games.playing,
+        ),
+        games,
+        Leaderboard(lambda: connect_db()),
+    )
 
     @route
     @server_only
@@ -51,79 +91,30 @@ def create_multiplayer_server():
 
     @route
     @forward_to_server
-    def request_match(id):
-        if id in State.game_lookup:
-            game_id = State.game_lookup[id]
-            return {
-                "start": True,
-                "text": State.game_data[game_id]["text"],
-                "players": State.game_data[game_id]["players"],
-            }
-
-        if id not in State.queue:
-            State.queue[id] = [None, datetime.now()]
-
-        State.queue[id][0] = datetime.now()
-
-        to_remove = []
-
-        for player, (recent_time, join_time) in State.queue.items():
-            if datetime.now() - recent_time > QUEUE_TIMEOUT:
-                to_remove.append(player)
-
-        for player in to_remove:
-            del State.queue[player]
-
-        if (
-            len(State.queue) >= MAX_PLAYERS
-            or max(
-                datetime.now() - join_time
-                for recent_time, join_time in State.queue.values()
-            )
-            >= MAX_WAIT
-            and len(State.queue) >= MIN_PLAYERS
-        ):
-            # start game!
-            import cats_gui
-
-            curr_text = cats_gui.request_paragraph()
-            game_id = cats_gui.request_id()
-
-            for player in State.queue:
-                State.game_lookup[player] = game_id
-
-            queue = State.queue
-            players = list(queue.keys())
-
-            State.game_data[game_id] = {"text": curr_text, "players": players}
-
-            for player in queue:
-                State.progress[player] = [(0, time.time())]
-
-            State.queue.clear()
-
-            return {"start": True, "text": curr_text, "players": players}
-        else:
-            return {"start": False, "numWaiting": len(State.queue)}
+    def request_match(id, wait=0):
+        State.matchmaker.start()  # Only on the server, which matches players
+        matched, num_waiting = State.matchmaker.request(id, min(wait, MAX_MATCH_WAIT))
+        game = State.games.game_for(id) if matched else None
+        if game is not None:
+            return {"start": True, "text": game.text, "players": game.players}
+        return {"start": False, "numWaiting": num_waiting}
 
     @route
     @server_only
     def set_progress(id, progress):
         """Record progress message."""
-        State.progress[id].append((progress, time.time()))
+        State.games.record_progress(id, progress)
         return ""
 
     @route
     @forward_to_server
     def request_progress(targets):
-        now = {t: State.progress[t][-1] for t in targets}
-        elapsed = [[now[t][0], now[t][1] - State.progress[t][0][1]] for t in targets]
-        return elapsed
+        return State.games.last_progress(targets)
 
     @route
     @forward_to_server
     def request_all_progress(targets):
-        return [State.progress[target] for target in targets]
+        return State.games.all_progress(targets)
 
     @route
     @forward_to_server
@@ -136,47 +127,24 @@ def create_multiplayer_server():
         ):
             return
 
-        with connect_db() as db:
-            db("DELETE FROM leaderboard WHERE user_id = (%s)", [user])
-            db(
-                "INSERT INTO leaderboard (name, user_id, wpm) VALUES (%s, %s, %s)",
-                [name, user, wpm],
-            )
+        State.leaderboard.record(name, user, wpm)
 
     @route
     @forward_to_server
     def check_on_leaderboard(user):
-        with connect_db() as db:
-            users = list(
-                x[0]
-                for x in db(
-                    "SELECT user_id FROM leaderboard ORDER BY wpm DESC LIMIT 20"
-                ).fetchall()
-            )
-        return bool(user in users)
+        return State.leaderboard.contains(user)
 
     @route
     @forward_to_server
     def update_name(new_name, user):
         if len(new_name) > MAX_NAME_LENGTH:
             return
-        with connect_db() as db:
-            db("UPDATE leaderboard SET name=(%s) WHERE user_id=(%s)", [new_name, user])
+        State.leaderboard.rename(user, new_name)
 
     @route
     @forward_to_server
     def check_leaderboard_eligibility(wpm, user, token):
-        with connect_db() as db:
-            vals = db(
-                "SELECT wpm FROM leaderboard ORDER BY wpm DESC LIMIT 20"
-            ).fetchall()
-            threshold = vals[-1][0] if len(vals) >= 20 else 0
-            prev_best = db(
-                "SELECT wpm FROM leaderboard WHERE user_id=(%s)", [user]
-            ).fetchone()
-            if prev_best:
-                threshold = max(threshold, prev_best[0])
-
+        threshold = State.leaderboard.threshold(user)
         authorized_limit = get_authorized_limit(user=user, token=token)
 
         return {
@@ -223,10 +191,4 @@ def create_multiplayer_server():
     @route
     @forward_to_server
     def leaderboard():
-        with connect_db() as db:
-            return list(
-                list(x)
-                for x in db(
-                    "SELECT name, wpm FROM leaderboard ORDER BY wpm DESC LIMIT 20"
-                ).fetchall()
-            )
+        return State.leaderboard.top()
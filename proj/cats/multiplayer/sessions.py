@@ -0,0 +1,190 @@
+"""Bounded storage for multiplayer games and the progress of their players."""
+
+import array
+import threading
+import time
+
+FINISHED_GAME_TTL = 60  # Seconds a game is kept once every player finished
+ABANDONED_GAME_TTL = 15 * 60  # Seconds a game is kept without any progress
+EXPIRY_INTERVAL = 10  # Minimum seconds between sweeps for expired games
+
+
+class ProgressLog:
+    """The progress of one player through NUM_WORDS words: the starting
+    sample, the time each word was first finished, and the latest sample.
+    Reports that repeat or go back to an earlier word only change the latest
+    sample, so the samples always give the time spent on each word.
+
+    >>> log = ProgressLog(100.0, num_words=3)
+    >>> for progress, t in [(1/3, 101.0), (1/3, 102.0), (0, 103.0), (1/3, 104.0),
+    ...                     (2/3, 105.0), (2/3, 106.0), (1, 108.0), (1, 109.0)]:
+    ...     log.append(progress, t)
+    >>> log.last()
+    (1, 109.0)
+    >>> log.samples()
+    [(0, 100.0), (0.3333333333333333, 101.0), (0.6666666666666666, 105.0), (1.0, 108.0)]
+    >>> times = [t for _, t in log.samples()]
+    >>> [finish - start for start, finish in zip(times, times[1:])]  # Seconds per word
+    [1.0, 4.0, 3.0]
+    """
+
+    def __init__(self, start_time, num_words):
+        self.start = (0, start_time)
+        self.times = array.array('d', [0.0]) * num_words  # When each word was finished
+        self.finished = 0  # Number of words with a finishing time
+        self.latest = self.start
+
+    def append(self, progress, t):
+        self.latest = (progress, t)
+        num_words = len(self.times)
+        # A jump over several words finishes all of them at once.
+        reached = min(num_words, round(progress * num_words))
+        while self.finished < reached:
+            self.times[self.finished] = t
+            self.finished += 1
+
+    def last(self):
+        """Return the most recent sample."""
+        return self.latest
+
+    def samples(self):
+        """Return the starting sample followed by one sample per finished
+        word, at the time the word was first finished.
+        """
+        num_words = len(self.times)
+        return [self.start] + [((i + 1) / num_words, self.times[i])
+                               for i in range(self.finished)]
+
+
+class Game:
+    """A game of TEXT among PLAYERS that started at START_TIME."""
+
+    def __init__(self, text, players, start_time):
+        num_words = len(text.split())
+        self.text = text
+        self.players = players
+        self.progress = {p: ProgressLog(start_time, num_words) for p in players}
+        self.last_active = start_time
+        self.finished_at = None  # Set once every player has finished
+
+    def record(self, player, progress, t):
+        self.progress[player].append(progress, t)
+        self.last_active = t
+        if self.finished_at is None and all(
+            log.last()[0] >= 1 for log in self.progress.values()
+        ):
+            self.finished_at = t
+
+    def expired(self, now):
+        if self.finished_at is not None and now - self.finished_at > FINISHED_GAME_TTL:
+            return True
+        return now - self.last_active > ABANDONED_GAME_TTL
+
+
+class GameSessions:
+    """The games being played, looked up by game id or by player id. Games
+    are dropped some time after they finish or stop receiving progress.
+    All methods are safe to call from several threads.
+
+    >>> sessions = GameSessions()
+    >>> sessions.create_game(7, 'a b c', [1, 2], now=100.0)
+    >>> sessions.record_progress(1, 1 / 3, now=101.0)
+    >>> sessions.last_progress([1, 2])
+    [[0.3333333333333333, 1.0], [0, 0.0]]
+    >>> sessions.game_for(2).text
+    'a b c'
+    >>> sessions.record_progress(1, 1.0, now=102.0)
+    >>> sessions.playing(1, now=103.0), sessions.playing(2, now=103.0)
+    (False, True)
+    >>> sessions.create_game(8, 'd e', [1, 2, 3], now=104.0)
+    >>> sessions.game_for(1).players, sessions.game_for(2).players
+    ([1, 3], [1, 2])
+    >>> sessions.expire(now=104.0 + ABANDONED_GAME_TTL + 1)
+    >>> sessions.game_for(1), sessions.game_for(2)
+    (None, None)
+    """
+
+    def __init__(self):
+        self.games = {}  # Game id -> Game
+        self.player_games = {}  # Player id -> game id
+        self.lock = threading.Lock()
+        self.last_sweep = time.time()
+
+    def create_game(self, game_id, text, players, now=None):
+        """Start a game of TEXT among PLAYERS. Players who are still playing
+        another game are left out, and their game is not changed.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            players = [p for p in players if not self._playing(p, now)]
+            if not players:
+                return
+            self.games[game_id] = Game(text, players, now)
+            for player in players:
+                self.player_games[player] = game_id
+        self._maybe_expire(now)
+
+    def game_for(self, player):
+        """Return the game that PLAYER is in, or None."""
+        with self.lock:
+            game_id = self.player_games.get(player)
+            return self.games.get(game_id)
+
+    def playing(self, player, now=None):
+        """Return whether PLAYER is in a game that has not expired and that
+        they have not finished.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            return self._playing(player, now)
+
+    def record_progress(self, player, progress, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            game = self.games.get(self.player_games.get(player))
+            if game is not None:
+                game.record(player, progress, now)
+        self._maybe_expire(now)
+
+    def last_progress(self, players):
+        """Return a [progress, elapsed seconds] pair for each of PLAYERS."""
+        result = []
+        with self.lock:
+            for player in players:
+                log = self._log(player)
+                progress, t = log.last()
+                result.append([progress, t - log.start[1]])
+        return result
+
+    def all_progress(self, players):
+        """Return the list of (progress, time) samples of each of PLAYERS."""
+        with self.lock:
+            return [self._log(player).samples() for player in players]
+
+    def expire(self, now=None):
+        """Remove every game that has expired."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.last_sweep = now
+            for game_id in [g for g, game in self.games.items() if game.expired(now)]:
+                self._remove(game_id)
+
+    def _maybe_expire(self, now):
+        if now - self.last_sweep > EXPIRY_INTERVAL:
+            self.expire(now)
+
+    def _playing(self, player, now):
+        game = self.games.get(self.player_games.get(player))
+        return (game is not None and not game.expired(now)
+                and game.progress[player].last()[0] < 1)
+
+    def _log(self, player):
+        game = self.games.get(self.player_games.get(player))
+        if game is None:
+            raise KeyError('player {0} is not in a game'.format(player))
+        return game.progress[player]
+
+    def _remove(self, game_id):
+        for player in self.games.pop(game_id).players:
+            if self.player_games.get(player) == game_id:
+                del self.player_games[player]
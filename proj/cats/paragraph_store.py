@@ -0,0 +1,69 @@
+"""An in-memory store of typing paragraphs indexed by the words they contain."""
+
+import random
+
+from utils import lines_from_file, lower, remove_punctuation, split
+
+
+class ParagraphStore:
+    """A list of PARAGRAPHS with an inverted index from each word, normalized
+    as cats.about normalizes it, to the positions of the paragraphs that
+    contain it.
+
+    >>> store = ParagraphStore(['Cute Dog!', 'That is a cat.', 'Nice pup.'])
+    >>> store.matching(['dog', 'pup'])
+    [0, 2]
+    >>> store.random_paragraph(['cat'])
+    'That is a cat.'
+    >>> store.random_paragraph(['fish'])
+    ''
+    """
+
+    def __init__(self, paragraphs):
+        self.paragraphs = paragraphs
+        self.postings = {}  # Word -> list of paragraph positions
+        self.posting_sets = {}  # Word -> set of paragraph positions
+        for position, paragraph in enumerate(paragraphs):
+            for word in set(split(remove_punctuation(lower(paragraph)))):
+                self.postings.setdefault(word, []).append(position)
+        for word, positions in self.postings.items():
+            self.posting_sets[word] = set(positions)
+
+    @classmethod
+    def from_file(cls, path):
+        """Return a store of the paragraphs in the file at PATH."""
+        return cls(lines_from_file(path))
+
+    def matching(self, topics):
+        """Return the sorted positions of the paragraphs that contain any of
+        the words in TOPICS.
+        """
+        found = set()
+        for topic in set(topics):
+            found.update(self.postings.get(topic, ()))
+        return sorted(found)
+
+    def random_paragraph(self, topics=None, rng=random):
+        """Return a paragraph chosen uniformly at random from those that
+        contain any of the words in TOPICS, or from all paragraphs if there
+        are no TOPICS. Return '' if no paragraph matches.
+        """
+        if not topics:
+            return rng.choice(self.paragraphs) if self.paragraphs else ''
+        topics = [t for t in set(topics) if t in self.postings]
+        total = sum(len(self.postings[t]) for t in topics)
+        if total == 0:
+            return ''
+        while True:
+            # Draw from all postings of all topics together, and accept a
+            # paragraph found under k topics with chance 1/k so that every
+            # matching paragraph is equally likely.
+            i = rng.randrange(total)
+            for topic in topics:
+                if i < len(self.postings[topic]):
+                    position = self.postings[topic][i]
+                    break
+                i -= len(self.postings[topic])
+            shared = sum(1 for t in topics if position in self.posting_sets[t])
+            if rng.random() * shared < 1:
+                return self.paragraphs[position]
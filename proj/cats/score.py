@@ -1,44 +1,219 @@
-import cats
+"""A reproducible benchmark of autocorrect accuracy and speed.
+
+Each run corrects the same seeded sample of typos from data/testcases.out
+with every chosen diff function and candidate filter, and reports latency
+percentiles, corrections per second, accuracy, and diff function calls.
+Results can be written as JSON and compared with an earlier run.
+
+    python3 score.py --iterations 500 --output bench.json
+    python3 score.py --baseline bench.json
+"""
+
+import argparse
+import json
 import pickle
-import time
 import random
+import time
+
+import cats
+from utils import count
+from word_cache import WordStore, similar_positions
+from word_index import DeletionIndex
+
+TESTCASES_PATH = "data/testcases.out"
+ITERATIONS = 300  # Typos corrected per diff function and filter
+SEED = 61
+SIMILARITY_LIMIT = 2  # Edits allowed by the filters, as in cats_gui
+
+DIFF_FUNCTIONS = {
+    "furry_fixes": cats.furry_fixes,
+    "minimum_mewtations": cats.minimum_mewtations,
+    "final_diff": cats.final_diff,
+}
+FILTERS = ["all", "letters", "index"]
+
+
+def load_testcases(path=TESTCASES_PATH):
+    """Return a dictionary from each correct word to a list of its typos."""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def sample_typos(testcases, iterations, seed=SEED):
+    """Return a list of ITERATIONS (typo, correct) pairs, drawn in a fixed
+    order that depends only on SEED.
+
+    >>> sample_typos({'cat': ['cta'], 'dog': ['dgo', 'og']}, 4, seed=1)
+    [('cta', 'cat'), ('og', 'dog'), ('cta', 'cat'), ('dgo', 'dog')]
+    """
+    pairs = sorted((typo, correct) for correct in testcases
+                   for typo in testcases[correct])
+    rng = random.Random(seed)
+    return [rng.choice(pairs) for _ in range(iterations)]
+
+
+def percentile(values, p):
+    """Return the P-th percentile of the sorted list VALUES, using the
+    nearest-rank method.
+
+    >>> percentile([1, 2, 3, 4], 50), percentile([1, 2, 3, 4], 99)
+    (2, 4)
+    """
+    if not values:
+        return 0
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def make_filter(name, words, similarity=SIMILARITY_LIMIT):
+    """Return a function that takes a typed word and returns the list of
+    WORDS to score against it, for the filter called NAME.
+
+    >>> words = ['cat', 'dog', 'cart', 'scatter']
+    >>> [make_filter(n, words)('cta') for n in FILTERS]
+    [['cat', 'dog', 'cart', 'scatter'], ['cat', 'cart'], ['cat', 'cart']]
+    """
+    if name == "all":
+        return lambda typed: words
+    store = WordStore.build(words)
+    if name == "letters":
+        return lambda typed: [words[p] for p in similar_positions(store, typed, similarity)]
+    if name == "index":
+        index = DeletionIndex.build(store, similarity)
+
+        def candidates(typed):
+            positions = index.candidate_positions(typed, similarity)
+            return [words[p] for p in similar_positions(store, typed, similarity, positions)]
+        return candidates
+    raise ValueError('unknown filter: ' + name)
+
+
+def benchmark(diff_function, candidates, pairs, limit):
+    """Correct each typo in PAIRS using DIFF_FUNCTION on the words that
+    CANDIDATES returns, and return a dictionary of measurements. Memoized
+    diff functions start with an empty cache, so runs do not share results.
+    Calls are counted by the call_count of DIFF_FUNCTION if it has one, which
+    includes its recursive calls, and otherwise as calls from autocorrect.
+    """
+    if hasattr(diff_function, 'cache_clear'):
+        diff_function.cache_clear()
+    if hasattr(diff_function, 'call_count'):
+        counted = diff_function
+    else:
+        counted = count(diff_function)
+    calls_before = counted.call_count
+
+    latencies = []
+    correct = incorrect = unchanged = scored = 0
+    start = time.perf_counter()
+    for typo, answer in pairs:
+        before = time.perf_counter()
+        words = candidates(typo)
+        guess = cats.autocorrect(typo, words, counted, limit) if words else typo
+        latencies.append(time.perf_counter() - before)
+        scored += len(words)
+        if guess == answer:
+            correct += 1
+        elif guess == typo:
+            unchanged += 1
+        else:
+            incorrect += 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    n = len(pairs)
+    return {
+        "corrections": n,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "corrections_per_second": n / elapsed if elapsed else 0,
+        "accuracy": correct / n if n else 0,
+        "correct": correct,
+        "incorrect": incorrect,
+        "unchanged": unchanged,
+        "diff_calls": counted.call_count - calls_before,
+        "mean_candidates": scored / n if n else 0,
+    }
+
+
+def run_benchmarks(diff_names, filter_names, iterations=ITERATIONS, seed=SEED,
+                   limit=cats.FINAL_DIFF_LIMIT, words_path=None):
+    """Return a report of every combination of the diff functions and
+    filters named in DIFF_NAMES and FILTER_NAMES. Typos are corrected to the
+    correct words in the test cases, or to the words in WORDS_PATH if given.
+    """
+    testcases = load_testcases()
+    if words_path:
+        words = cats.lines_from_file(words_path)
+    else:
+        words = list(testcases)
+    pairs = sample_typos(testcases, iterations, seed)
+    results = []
+    for filter_name in filter_names:
+        candidates = make_filter(filter_name, words)
+        for diff_name in diff_names:
+            result = benchmark(DIFF_FUNCTIONS[diff_name], candidates, pairs, limit)
+            result.update({"diff": diff_name, "filter": filter_name})
+            results.append(result)
+    return {
+        "seed": seed,
+        "iterations": iterations,
+        "limit": limit,
+        "words": words_path or TESTCASES_PATH,
+        "results": results,
+    }
+
+
+def print_report(report, baseline=None):
+    """Print one line per result, with the change from the matching result
+    in BASELINE if it is given.
+    """
+    previous = {}
+    for result in (baseline or {}).get("results", []):
+        previous[result["diff"], result["filter"]] = result
+    print(f"{'diff':<20}{'filter':<9}{'p50 ms':>9}{'p99 ms':>9}{'per sec':>10}"
+          f"{'accuracy':>10}{'calls':>10}")
+    for r in report["results"]:
+        print(f"{r['diff']:<20}{r['filter']:<9}{r['p50_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+              f"{r['corrections_per_second']:>10.1f}{r['accuracy']:>10.3f}{r['diff_calls']:>10}")
+        old = previous.get((r["diff"], r["filter"]))
+        if old:
+            print(f"{'  vs baseline':<29}{r['p50_ms'] - old['p50_ms']:>+9.3f}"
+                  f"{r['p99_ms'] - old['p99_ms']:>+9.3f}"
+                  f"{r['corrections_per_second'] - old['corrections_per_second']:>+10.1f}"
+                  f"{r['accuracy'] - old['accuracy']:>+10.3f}"
+                  f"{r['diff_calls'] - old['diff_calls']:>+10}")
+
+
+def run():
+    """Read in the command-line argument and benchmark autocorrect."""
+    parser = argparse.ArgumentParser(description="Benchmark autocorrect")
+    parser.add_argument('--diff', '-d', nargs='+', choices=list(DIFF_FUNCTIONS),
+                        default=list(DIFF_FUNCTIONS), help='Diff functions to run')
+    parser.add_argument('--filter', '-f', nargs='+', choices=FILTERS,
+                        default=FILTERS, help='Candidate filters to run')
+    parser.add_argument('--iterations', '-n', type=int, default=ITERATIONS,
+                        help='Typos corrected per diff function and filter')
+    parser.add_argument('--seed', '-s', type=int, default=SEED,
+                        help='Seed that chooses the typos')
+    parser.add_argument('--limit', '-l', type=int, default=cats.FINAL_DIFF_LIMIT,
+                        help='Limit passed to the diff functions')
+    parser.add_argument('--words', '-w', help='File of words to correct to')
+    parser.add_argument('--output', '-o', help='File to write JSON results to')
+    parser.add_argument('--baseline', '-b', help='JSON results to compare with')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.diff, args.filter, args.iterations, args.seed,
+                            args.limit, args.words)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
 
 if __name__ == '__main__':
-    pickled_file = "data/testcases.out"
-    word_list = "data/final_diff_words.txt"
-
-    with open(pickled_file.strip(), 'rb') as pickled_dict:
-        test_dict = pickle.load(pickled_dict)
-
-    with open(word_list.strip(), 'r', encoding='utf8') as correct_file:
-        correct_words = list(correct_file.read().split())
-
-    start_time = time.time()
-
-    correct_words = list(test_dict.keys())
-    random.shuffle(correct_words)
-    correctly_corrected, incorrectly_corrected, not_corrected, trial_counter = 0, 0, 0, 0
-    for correct in correct_words:
-        elapsed_time = time.time() - start_time
-        if elapsed_time > 45:
-            break
-        typos = test_dict[correct]
-        for_print = f"{correct}\n"
-        for typo in typos:
-            guess = cats.autocorrect(typo, correct_words, cats.final_diff, cats.FINAL_DIFF_LIMIT)
-            if guess == correct:
-                for_print += f"\tCorrect: ({typo} -> {guess})\n"
-                correctly_corrected += 1
-            elif guess != typo:
-                for_print += f"\tIncorrect: ({typo} -> {guess})\n"
-                incorrectly_corrected += 1
-            else:
-                for_print += f"\tNo change: ({typo} -> {typo})\n"
-                not_corrected += 1
-            trial_counter += 1
-        print(for_print)
-
-    print(f"Correction Speed: {(trial_counter / elapsed_time) * 60} wpm")
-    print(f"Correctly Corrected: {correctly_corrected} words")
-    print(f"Incorrectly Corrected: {incorrectly_corrected} words")
-    print(f"Uncorrected: {not_corrected} words")
\ No newline at end of file
+    run()
@@ -0,0 +1,93 @@
+"""Live accuracy and speed for a paragraph that is being typed.
+
+A TypingSession keeps the typed text split into words and counts the words
+that match the prompt, updating both as the text is edited. An edit only
+re-splits the text from the word it touches to the end, so the usual
+keystrokes, which add or delete characters at the end, cost time in
+proportion to the last word instead of the whole paragraph.
+"""
+
+import bisect
+import re
+import threading
+
+from utils import split
+
+WORD = re.compile(r'\S+')
+
+
+class TypingSession:
+    """The text typed so far for PROMPT. Accuracy and wpm agree with
+    cats.accuracy and cats.wpm for the same text. Callers that share a
+    session between threads hold its lock while using it.
+
+    >>> session = TypingSession('Cute Dog. I say!')
+    >>> session.edit(0, 0, 'Cute Dg')
+    >>> session.accuracy()
+    50.0
+    >>> session.edit(6, 1, 'og.')
+    >>> session.typed, session.accuracy()
+    ('Cute Dog.', 100.0)
+    >>> session.update('Cute Dog. I')
+    >>> session.accuracy(), session.wpm(6)
+    (100.0, 22.0)
+    >>> session.update('Cute')
+    >>> session.accuracy()
+    100.0
+    """
+
+    def __init__(self, prompt):
+        self.prompt = split(prompt)
+        self.typed = ''
+        self.words = []  # Words of the typed text
+        self.starts = []  # Position in the typed text where each word starts
+        self.correct = 0  # Number of words that match the prompt
+        self.lock = threading.Lock()
+
+    def edit(self, position, removed, inserted):
+        """Replace the REMOVED characters of the typed text that start at
+        POSITION with the string INSERTED.
+        """
+        typed = self.typed
+        self.typed = typed[:position] + inserted + typed[position + removed:]
+        # Words before the one containing POSITION are unchanged; a word that
+        # ends right at POSITION may be extended, so it is re-split as well.
+        first = max(0, bisect.bisect_right(self.starts, position) - 1)
+        for i in range(first, min(len(self.words), len(self.prompt))):
+            self.correct -= self.words[i] == self.prompt[i]
+        start = self.starts[first] if first else 0
+        del self.words[first:], self.starts[first:]
+        for match in WORD.finditer(self.typed, start):
+            i = len(self.words)
+            self.words.append(match.group())
+            self.starts.append(match.start())
+            if i < len(self.prompt):
+                self.correct += self.words[i] == self.prompt[i]
+
+    def update(self, typed):
+        """Change the typed text to TYPED, editing only what differs from
+        the current text.
+        """
+        old = self.typed
+        if typed.startswith(old):
+            self.edit(len(old), 0, typed[len(old):])
+        elif old.startswith(typed):
+            self.edit(len(typed), len(old) - len(typed), '')
+        else:
+            same = 0
+            while old[same] == typed[same]:
+                same += 1
+            self.edit(same, len(old) - same, typed[same:])
+
+    def accuracy(self):
+        """Return the percentage of typed words that match the prompt."""
+        if not self.words:
+            return 100.0 if not self.prompt else 0.0
+        if not self.prompt:
+            return 0.0
+        return self.correct / len(self.words) * 100
+
+    def wpm(self, elapsed):
+        """Return the words per minute typed in ELAPSED seconds."""
+        assert elapsed > 0, "Elapsed time must be positive"
+        return len(self.typed) / 5 * (60 / elapsed)
@@ -0,0 +1,214 @@
+"""A compact, memory-mapped cache of the dictionary used by the typing GUI.
+
+The cache file stores every word in one UTF-8 blob with an array of
+offsets, an array of positions that lists the words in sorted order for
+membership tests, and for each word a 26-bit letter signature with the
+number of distinct letters in it. It is mapped
+into memory rather than read, so server processes that load the same cache
+share its pages. Words keep the order of the source file, because
+autocorrect breaks ties in favor of earlier words.
+"""
+
+import array
+import mmap
+import os
+
+from word_index import source_stamp, padded_header
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CACHE_VERSION = 2
+
+
+def letter_mask(word):
+    """Return a number whose bit i is set when WORD contains the i-th letter
+    of the alphabet.
+
+    >>> bin(letter_mask('cab'))
+    '0b111'
+    >>> letter_mask('dad') == letter_mask('add')
+    True
+    """
+    mask = 0
+    for c in word:
+        if 'a' <= c <= 'z':
+            mask |= 1 << (ord(c) - 97)
+    return mask
+
+
+def popcount(mask):
+    """Return the number of set bits in MASK.
+
+    >>> popcount(letter_mask('banana'))
+    3
+    """
+    return bin(mask).count('1')
+
+
+def similar(w, v, n):
+    """Whether letter masks W and V share at least |W|-N and |V|-N letters.
+
+    >>> similar(letter_mask('cat'), letter_mask('cart'), 0)
+    False
+    >>> similar(letter_mask('cat'), letter_mask('cart'), 1)
+    True
+    """
+    intersect = popcount(w & v)
+    return intersect >= popcount(w) - n and intersect >= popcount(v) - n
+
+
+if numpy is not None:
+    _POPCOUNT_16 = numpy.array([popcount(i) for i in range(1 << 16)], dtype=numpy.uint8)
+
+
+def similar_positions(store, word, n, positions=None):
+    """Return the positions in STORE of the words whose letters are similar
+    to those of WORD within N, in order. Only POSITIONS are checked if they
+    are given, and otherwise every word is, using NumPy when available.
+
+    >>> store = WordStore.build(['cat', 'dog', 'act', 'tack', 'attic'])
+    >>> similar_positions(store, 'cta', 0)
+    [0, 2]
+    >>> similar_positions(store, 'cta', 1, [1, 3, 4])
+    [3, 4]
+    """
+    mask, size = letter_mask(word), popcount(letter_mask(word))
+    masks, counts = store.masks, store.counts
+    if positions is None and numpy is not None:
+        masks = numpy.frombuffer(masks, dtype=numpy.uint32)
+        counts = numpy.frombuffer(counts, dtype=numpy.uint8).astype(numpy.int64)
+        shared = masks & mask
+        intersect = _POPCOUNT_16[shared & 0xFFFF].astype(numpy.int64) + _POPCOUNT_16[shared >> 16]
+        found = (intersect >= counts - n) & (intersect >= size - n)
+        return numpy.flatnonzero(found).tolist()
+    if positions is None:
+        positions = range(len(store))
+    result = []
+    for p in positions:
+        intersect = popcount(masks[p] & mask)
+        if intersect >= counts[p] - n and intersect >= size - n:
+            result.append(p)
+    return result
+
+
+class WordStore:
+    """A read-only sequence of words backed by a blob and offset arrays.
+
+    >>> store = WordStore.build(['the', 'cat', 'sat'])
+    >>> list(store), store[1], len(store)
+    (['the', 'cat', 'sat'], 'cat', 3)
+    >>> 'sat' in store, 'dog' in store
+    (True, False)
+    >>> store.masks[1] == letter_mask('cat'), store.counts[1]
+    (True, 3)
+    """
+
+    def __init__(self, blob, offsets, order, masks, counts, mapping=None):
+        self.blob = blob
+        self.offsets = offsets  # Word i is blob[offsets[i]:offsets[i + 1]]
+        self.order = order  # Positions of the words in sorted order
+        self.masks = masks  # Letter signature of each word
+        self.counts = counts  # Number of distinct letters in each word
+        self._mapping = mapping  # Keeps a memory-mapped file open
+
+    @classmethod
+    def build(cls, words):
+        """Return a store of the list WORDS."""
+        encoded = [w.encode('utf-8') for w in words]
+        offsets = array.array('I', [0])
+        for e in encoded:
+            offsets.append(offsets[-1] + len(e))
+        order = array.array('I', sorted(range(len(words)), key=encoded.__getitem__))
+        masks = array.array('I', [letter_mask(w) for w in words])
+        counts = array.array('B', [popcount(m) for m in masks])
+        return cls(b''.join(encoded), offsets, order, masks, counts)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('word index out of range')
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, word):
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[self.order[mid]] < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < len(self.order) and self[self.order[lo]] == word
+
+    def save(self, path, stamp):
+        """Write the store to PATH, recording the STAMP of its source."""
+        header = 'cats-word-cache {0} {1} {2} {3}'.format(
+            CACHE_VERSION, len(self), len(self.blob), stamp)
+        with open(path, 'wb') as f:
+            f.write(padded_header(header))
+            f.write(bytes(self.offsets))
+            f.write(bytes(self.order))
+            f.write(bytes(self.masks))
+            f.write(bytes(self.counts))
+            f.write(self.blob)
+
+    @classmethod
+    def load(cls, path, stamp):
+        """Return the store saved at PATH by mapping it into memory, or None
+        if it is missing or was saved from a different source.
+        """
+        try:
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            start = mapping.find(b'\n') + 1
+            header = str(mapping[:start], 'utf-8').split()
+            if header[:2] != ['cats-word-cache', str(CACHE_VERSION)] or header[4:] != [stamp]:
+                mapping.close()
+                return None
+            count, blob_size = int(header[2]), int(header[3])
+            view = memoryview(mapping)
+            sections = []
+            for size, code in ((count + 1, 'I'), (count, 'I'), (count, 'I'), (count, 'B')):
+                end = start + array.array(code).itemsize * size
+                sections.append(view[start:end].cast(code))
+                start = end
+            blob = view[start:start + blob_size]
+            if len(blob) != blob_size:
+                raise ValueError('truncated word cache')
+        except (ValueError, IndexError, UnicodeDecodeError):
+            view = sections = blob = None  # Release the views so that the mapping can close.
+            mapping.close()
+            return None
+        return cls(blob, *sections, mapping=mapping)
+
+
+def load_words(source_path, cache_path):
+    """Return a WordStore of the lines of SOURCE_PATH, read from the cache at
+    CACHE_PATH if it is up to date, and otherwise built and saved there.
+    """
+    stamp = source_stamp(source_path)
+    store = WordStore.load(cache_path, stamp)
+    if store is None:
+        with open(source_path, 'r') as f:
+            store = WordStore.build([line.strip() for line in f.readlines()])
+        try:
+            tmp_path = '{0}.tmp{1}'.format(cache_path, os.getpid())
+            store.save(tmp_path, stamp)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            return store  # The cache is only an optimization.
+        store = WordStore.load(cache_path, stamp) or store
+    return store
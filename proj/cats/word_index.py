@@ -0,0 +1,180 @@
+"""A deletion index for finding dictionary words close to a typed word.
+
+Two words are within edit distance D only if deleting at most D letters
+from the first PREFIX_LENGTH letters of each can make them equal, so the
+index maps every such deletion of every dictionary word to the word's
+position. A query generates the deletions of the typed word and looks them
+up, which yields a small superset of the words within the limit.
+
+Deletions are stored as 32-bit hashes in a sorted array, which keeps the
+index compact enough to save to disk and map into memory, so that server
+processes share it. A hash collision only adds a candidate, never removes
+one.
+"""
+
+import array
+import bisect
+import mmap
+import os
+import zlib
+
+PREFIX_LENGTH = 7
+MAX_DISTANCE = 2
+INDEX_VERSION = 2
+
+
+def deletions(word, distance):
+    """Return the set of strings formed by deleting at most DISTANCE letters
+    from WORD.
+
+    >>> sorted(deletions('cat', 1))
+    ['at', 'ca', 'cat', 'ct']
+    """
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def deletion_key(s):
+    """Return the 32-bit hash under which the deletion S is indexed."""
+    return zlib.crc32(s.encode('utf-8'))
+
+
+def source_stamp(path):
+    """Return a string that changes whenever the file at PATH changes."""
+    stat = os.stat(path)
+    return '{0}-{1}'.format(stat.st_size, stat.st_mtime_ns)
+
+
+def padded_header(header):
+    """Return HEADER as an encoded line padded with spaces to a multiple of
+    8 bytes, so that arrays written after it stay aligned.
+
+    >>> padded_header('abc')
+    b'abc    \\n'
+    """
+    line = header.encode('utf-8')
+    return line + b' ' * (7 - len(line) % 8) + b'\n'
+
+
+class DeletionIndex:
+    """An index of WORDS that finds the words within MAX_DISTANCE edits of a
+    typed word.
+
+    >>> index = DeletionIndex.build(['cat', 'dog', 'cart', 'scatter'])
+    >>> index.candidates('cta', 2)
+    ['cat', 'cart']
+    >>> index.candidates('scater', 1)
+    ['scatter']
+    """
+
+    def __init__(self, words, keys, positions, max_distance=MAX_DISTANCE):
+        self.words = words
+        self.keys = keys  # Sorted deletion hashes
+        self.positions = positions  # positions[i] is the word for keys[i]
+        self.max_distance = max_distance
+
+    @classmethod
+    def build(cls, words, max_distance=MAX_DISTANCE):
+        """Return an index of the list WORDS."""
+        # Sort (hash, position) pairs packed into one integer, in 256 buckets
+        # by the hash's top byte to keep the lists being sorted small.
+        buckets = [array.array('Q') for _ in range(256)]
+        for position, word in enumerate(words):
+            for deletion in deletions(word[:PREFIX_LENGTH], max_distance):
+                key = deletion_key(deletion)
+                buckets[key >> 24].append(key << 32 | position)
+        keys, positions = array.array('I'), array.array('I')
+        for bucket in buckets:
+            for entry in sorted(bucket):
+                keys.append(entry >> 32)
+                positions.append(entry & 0xFFFFFFFF)
+        return cls(words, keys, positions, max_distance)
+
+    def candidates(self, word, limit):
+        """Return the words in the index that may be within LIMIT edits of
+        WORD, in the order they appear in the word list. If LIMIT is larger
+        than the index supports, return every word.
+        """
+        if limit > self.max_distance:
+            return list(self.words)
+        return [self.words[p] for p in self.candidate_positions(word, limit)]
+
+    def candidate_positions(self, word, limit):
+        """Return the sorted positions in the word list of the words that may
+        be within LIMIT edits of WORD. LIMIT must be at most max_distance.
+        """
+        assert limit <= self.max_distance, 'limit is too large for this index'
+        found = set()
+        keys, positions = self.keys, self.positions
+        for deletion in deletions(word[:PREFIX_LENGTH], limit):
+            key = deletion_key(deletion)
+            i = bisect.bisect_left(keys, key)
+            while i < len(keys) and keys[i] == key:
+                found.add(positions[i])
+                i += 1
+        return sorted(found)
+
+    def save(self, path, stamp):
+        """Write the index to PATH, recording the STAMP of its source."""
+        header = 'cats-deletion-index {0} {1} {2} {3} {4} {5}'.format(
+            INDEX_VERSION, PREFIX_LENGTH, self.max_distance,
+            len(self.words), len(self.keys), stamp)
+        tmp_path = '{0}.tmp{1}'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(padded_header(header))
+            self.keys.tofile(f)
+            self.positions.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, words, stamp, max_distance=MAX_DISTANCE):
+        """Return the index of WORDS saved at PATH by mapping it into memory,
+        or None if it is missing or was built from a different source or
+        with different settings.
+        """
+        try:
+            with open(path, 'rb') as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            start = mapping.find(b'\n') + 1
+            header = str(mapping[:start], 'utf-8').split()
+            expected = ['cats-deletion-index', str(INDEX_VERSION),
+                        str(PREFIX_LENGTH), str(max_distance), str(len(words))]
+            if header[:5] != expected or header[6:] != [stamp]:
+                mapping.close()
+                return None
+            size = int(header[5])
+            if len(mapping) != start + 8 * size:
+                raise ValueError('truncated deletion index')
+            view = memoryview(mapping)
+            keys = view[start:start + 4 * size].cast('I')
+            positions = view[start + 4 * size:].cast('I')
+        except (ValueError, IndexError, UnicodeDecodeError):
+            view = keys = positions = None  # Release the views so that the mapping can close.
+            mapping.close()
+            return None
+        index = cls(words, keys, positions, max_distance)
+        index._mapping = mapping  # Keeps the memory-mapped file open
+        return index
+
+
+def load_index(words, source_path, index_path, max_distance=MAX_DISTANCE):
+    """Return an index of WORDS, which were read from SOURCE_PATH. The index
+    is read from INDEX_PATH if it is up to date, and otherwise built and
+    saved there.
+    """
+    stamp = source_stamp(source_path)
+    index = DeletionIndex.load(index_path, words, stamp, max_distance)
+    if index is None:
+        index = DeletionIndex.build(words, max_distance)
+        try:
+            index.save(index_path, stamp)
+        except OSError:
+            pass  # The saved index is only an optimization.
+    return index
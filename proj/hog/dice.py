@@ -10,8 +10,14 @@ and are generated by the make_fair_dice function.
 Test dice are deterministic: they always cycles through a fixed
 sequence of values that are passed as arguments.
 Test dice are generated by the make_test_dice function.
+
+Seeded dice are fair dice whose outcomes are reproducible. They are
+generated by the make_seeded_dice function, and independent random
+generators for them (for example, one per worker process) are created by
+the spawn_rngs function.
 """
 
+import random
 from random import randint
 
 def make_fair_dice(sides):
@@ -24,6 +30,58 @@ def make_fair_dice(sides):
 four_sided = make_fair_dice(4)
 six_sided = make_fair_dice(6)
 
+def as_rng(rng=None):
+    """Return RNG if it is a random.Random or a NumPy Generator, and
+    otherwise a random.Random seeded with RNG."""
+    if isinstance(rng, random.Random) or hasattr(rng, 'integers'):
+        return rng
+    return random.Random(rng)
+
+def make_seeded_dice(sides, rng=None, block_size=256):
+    """Return a fair die that returns 1 to SIDES using RNG, which is a seed,
+    a random.Random, or a NumPy Generator. Rolls are drawn BLOCK_SIZE at a
+    time and handed out one per call.
+
+    >>> dice = make_seeded_dice(6, 61)
+    >>> rolls = [dice() for _ in range(1000)]
+    >>> min(rolls), max(rolls)
+    (1, 6)
+    >>> small_blocks = make_seeded_dice(6, 61, block_size=7)
+    >>> rolls == [small_blocks() for _ in range(1000)]
+    True
+    """
+    assert type(sides) == int and sides >= 1, 'Illegal value for sides'
+    assert block_size >= 1, 'Illegal value for block_size'
+    rng = as_rng(rng)
+    if isinstance(rng, random.Random):
+        faces = range(1, sides + 1)
+        def draw():
+            return rng.choices(faces, k=block_size)
+    else:
+        def draw():
+            return rng.integers(1, sides + 1, size=block_size).tolist()
+    block, index = [], 0
+    def dice():
+        nonlocal block, index
+        if index == len(block):
+            block, index = draw(), 0
+        index += 1
+        return block[index - 1]
+    return dice
+
+def spawn_rngs(rng, count):
+    """Return a list of COUNT independent generators derived from RNG, which
+    is a seed, a random.Random, or a NumPy Generator.
+
+    >>> first, second = spawn_rngs(61, 2)
+    >>> make_seeded_dice(6, first)() == make_seeded_dice(6, spawn_rngs(61, 2)[0])()
+    True
+    """
+    rng = as_rng(rng)
+    if hasattr(rng, 'spawn'):
+        return rng.spawn(count)
+    return [random.Random(rng.getrandbits(128)) for _ in range(count)]
+
 def make_test_dice(*outcomes):
     """Return a die that cycles deterministically through OUTCOMES.
 
@@ -111,8 +111,44 @@ def num_factors(n):
     # END PROBLEM 4
 
 
+def build_sus_tables(limit):
+    """Return a pair of lists (FACTOR_COUNTS, NEXT_PRIMES) such that for every
+    0 <= n < LIMIT, FACTOR_COUNTS[n] is num_factors(n) and NEXT_PRIMES[n] is
+    the smallest prime greater than n.
+
+    >>> factor_counts, next_primes = build_sus_tables(30)
+    >>> factor_counts[28], next_primes[28]
+    (6, 29)
+    >>> next_primes[29]
+    31
+    """
+    factor_counts = [0] * limit
+    for factor in range(1, limit):
+        for multiple in range(factor, limit, factor):
+            factor_counts[multiple] += 1
+    following = limit
+    while not is_prime(following):
+        following += 1
+    next_primes = [0] * limit
+    for n in range(limit - 1, -1, -1):
+        next_primes[n] = following
+        if factor_counts[n] == 2:
+            following = n
+    return factor_counts, next_primes
+
+
+# Sus Fuss answers are looked up for every score reachable in a game to GOAL:
+# up to GOAL - 1 points before a turn plus at most 60 points from ten sixes.
+SUS_TABLE_LIMIT = GOAL + 60
+FACTOR_COUNTS, NEXT_PRIMES = build_sus_tables(SUS_TABLE_LIMIT)
+
+
 def sus_points(score):
     """Return the new score of a player taking into account the Sus Fuss rule."""
+    if score < SUS_TABLE_LIMIT:
+        if FACTOR_COUNTS[score] == 3 or FACTOR_COUNTS[score] == 4:
+            return NEXT_PRIMES[score]
+        return score
     # BEGIN PROBLEM 4
     if num_factors(score) == 3 or num_factors(score) == 4:
         while True:
@@ -318,6 +354,93 @@ def average_win_rate(strategy, baseline=always_roll(6)):
     return (win_rate_as_player_0 + win_rate_as_player_1) / 2
 
 
+def roll_dice_outcomes(num_rolls, sides=6):
+    """Return a list of (points, probability) pairs giving every possible
+    result of roll_dice(NUM_ROLLS) with a fair SIDES-sided dice.
+
+    >>> [(points, round(p, 3)) for points, p in roll_dice_outcomes(1)]
+    [(1, 0.167), (2, 0.167), (3, 0.167), (4, 0.167), (5, 0.167), (6, 0.167)]
+    >>> [(points, round(p, 3)) for points, p in roll_dice_outcomes(2)][:3]
+    [(1, 0.306), (4, 0.028), (5, 0.056)]
+    >>> round(sum(p for _, p in roll_dice_outcomes(10)), 10)
+    1.0
+    """
+    key = (num_rolls, sides)
+    if key not in _roll_dice_outcomes_cache:
+        assert 1 <= num_rolls <= 10, "Must roll between 1 and 10 dice."
+        # sums[t] is the chance that the rolls so far total T with no 1s.
+        sums = {0: 1.0}
+        for _ in range(num_rolls):
+            next_sums = {}
+            for total, p in sums.items():
+                for outcome in range(2, sides + 1):
+                    next_total = total + outcome
+                    next_sums[next_total] = next_sums.get(next_total, 0) + p / sides
+            sums = next_sums
+        outcomes = [(1, 1 - (1 - 1 / sides) ** num_rolls)]
+        outcomes.extend(sorted(sums.items()))
+        _roll_dice_outcomes_cache[key] = outcomes
+    return _roll_dice_outcomes_cache[key]
+
+
+_roll_dice_outcomes_cache = {}
+
+
+def win_probabilities(strategy0, strategy1, sus_fuss=True, goal=GOAL):
+    """Return a table WIN such that WIN[who][score][opponent_score] is the exact
+    chance that player WHO, about to take a turn with SCORE points against
+    OPPONENT_SCORE, goes on to win a game of STRATEGY0 against STRATEGY1
+    played with six-sided dice. Boar Brawl always applies; Sus Fuss applies
+    when SUS_FUSS is true.
+
+    >>> win = win_probabilities(always_roll(0), always_roll(0), goal=5)
+    >>> win[0][0][0], win[1][0][1]
+    (1.0, 0.0)
+    """
+    strategies = (strategy0, strategy1)
+    # The highest score reachable in one turn is goal - 1 plus 10 sixes.
+    if sus_fuss:
+        after_turn = [sus_points(score) for score in range(goal + 60)]
+    else:
+        after_turn = list(range(goal + 60))
+    win = [[[0.0] * goal for _ in range(goal)] for _ in range(2)]
+    # Every turn adds at least one point, so each state only depends on states
+    # with a larger total score.
+    for total in range(2 * goal - 2, -1, -1):
+        for score in range(max(0, total - goal + 1), min(total, goal - 1) + 1):
+            opponent_score = total - score
+            for who in (0, 1):
+                num_rolls = strategies[who](score, opponent_score)
+                if num_rolls == 0:
+                    outcomes = [(boar_brawl(score, opponent_score), 1.0)]
+                else:
+                    outcomes = roll_dice_outcomes(num_rolls)
+                chance = 0.0
+                opponent_win = win[1 - who][opponent_score]
+                for points, p in outcomes:
+                    new_score = after_turn[score + points]
+                    if new_score >= goal:
+                        chance += p
+                    else:
+                        chance += p * (1 - opponent_win[new_score])
+                win[who][score][opponent_score] = chance
+    return win
+
+
+def exact_win_rate(strategy, baseline=always_roll(6)):
+    """Return the exact win rate of STRATEGY against BASELINE under the Sus
+    Fuss rule, averaged over starting the game as player 0 and as player 1.
+    Unlike average_win_rate, no games are simulated.
+
+    >>> exact_win_rate(always_roll(6))
+    0.5
+    """
+    win_rate_as_player_0 = win_probabilities(strategy, baseline)[0][0][0]
+    win_rate_as_player_1 = 1 - win_probabilities(baseline, strategy)[0][0][0]
+
+    return (win_rate_as_player_0 + win_rate_as_player_1) / 2
+
+
 def run_experiments():
     """Run a series of strategy experiments and report results."""
     six_sided_max = max_scoring_num_rolls(six_sided)
@@ -405,8 +528,30 @@ def run(*args):
     parser.add_argument(
         "--run_experiments", "-r", action="store_true", help="Runs strategy experiments"
     )
+    parser.add_argument(
+        "--tournament", "-t", nargs="+", metavar="STRATEGY",
+        help="Plays a round robin between strategies, named like final_strategy, "
+        "module:function, module:factory(), or a number of dice",
+    )
+    parser.add_argument(
+        "--games", "-g", type=int, default=1000,
+        help="Games per pairing and seat in a tournament",
+    )
+    parser.add_argument("--seed", "-s", type=int, default=0, help="Tournament random seed")
+    parser.add_argument("--workers", "-w", type=int, help="Tournament worker processes")
+    parser.add_argument("--output", "-o", help="Writes tournament results as JSON")
 
     args = parser.parse_args()
 
     if args.run_experiments:
         run_experiments()
+
+    if args.tournament:
+        import hog_tournament
+
+        results = hog_tournament.run_tournament(
+            args.tournament, args.games, args.seed, args.workers
+        )
+        hog_tournament.print_results(results)
+        if args.output:
+            hog_tournament.write_results(results, args.output)
@@ -0,0 +1,83 @@
+"""Simulate many games of Hog at once with NumPy.
+
+Every game in a batch advances one turn per step, and all dice for all
+games in a step are drawn with a single call to the random generator.
+Strategies are given as strategy tables (see hog_solver), as strategy
+functions that depend only on the scores, or as a fixed number of dice.
+"""
+
+import numpy as np
+
+from hog import GOAL, sus_points
+from hog_solver import strategy_to_table
+
+
+def as_table_array(strategy, goal=GOAL):
+    """Return STRATEGY as a flat integer array indexed by
+    score * goal + opponent_score.
+    """
+    if isinstance(strategy, int):
+        return np.full(goal * goal, strategy, dtype=np.int64)
+    if callable(strategy):
+        strategy = strategy_to_table(strategy, goal)
+    table = np.frombuffer(bytes(strategy), dtype=np.uint8).astype(np.int64)
+    assert len(table) == goal * goal, "Table does not match goal."
+    return table
+
+
+def play_batch(strategy0, strategy1, num_games, sus_fuss=True, goal=GOAL, seed=None):
+    """Simulate NUM_GAMES independent games of STRATEGY0 against STRATEGY1
+    with six-sided dice and return a pair of arrays of final scores, with
+    Player 0's scores first. SEED is an integer seed or a NumPy Generator.
+
+    >>> score0, score1 = play_batch(5, 5, 1000, seed=61)
+    >>> len(score0), bool(((score0 >= GOAL) != (score1 >= GOAL)).all())
+    (1000, True)
+    """
+    rng = np.random.default_rng(seed)
+    tables = np.stack([as_table_array(strategy0, goal), as_table_array(strategy1, goal)])
+    if sus_fuss:
+        after_turn = np.array([sus_points(score) for score in range(goal + 60)])
+    else:
+        after_turn = np.arange(goal + 60)
+    scores = np.zeros((num_games, 2), dtype=np.int64)
+    who = np.zeros(num_games, dtype=np.int64)
+    playing = np.arange(num_games)  # Indices of games that are not over
+    dice_slots = np.arange(10)
+
+    while len(playing):
+        mover = who[playing]
+        score = scores[playing, mover]
+        opponent_score = scores[playing, 1 - mover]
+        num_rolls = tables[mover, score * goal + opponent_score]
+
+        rolls = rng.integers(1, 7, size=(len(playing), 10))
+        rolls[dice_slots >= num_rolls[:, None]] = 0
+        pig_out = (rolls == 1).any(axis=1)
+        points = np.where(pig_out, 1, rolls.sum(axis=1))
+
+        # Boar Brawl
+        brawl = 3 * np.abs(opponent_score // 10 % 10 - score % 10)
+        brawl[brawl == 0] = 1
+        points = np.where(num_rolls == 0, brawl, points)
+
+        score = after_turn[score + points]
+        scores[playing, mover] = score
+        still_playing = score < goal
+        who[playing] = np.where(still_playing, 1 - mover, mover)
+        playing = playing[still_playing]
+
+    return scores[:, 0], scores[:, 1]
+
+
+def batch_win_rate(strategy, baseline=6, num_games=100000, sus_fuss=True, goal=GOAL, seed=None):
+    """Return the win rate of STRATEGY against BASELINE over NUM_GAMES
+    simulated games as each player, like hog.average_win_rate.
+    """
+    rng = np.random.default_rng(seed)
+    score0, _ = play_batch(strategy, baseline, num_games, sus_fuss, goal, rng)
+    win_rate_as_player_0 = np.mean(score0 >= goal)
+    _, score1 = play_batch(baseline, strategy, num_games, sus_fuss, goal, rng)
+    win_rate_as_player_1 = np.mean(score1 >= goal)
+
+    return float(win_rate_as_player_0 + win_rate_as_player_1) / 2
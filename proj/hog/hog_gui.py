@@ -7,6 +7,7 @@ from contextlib import redirect_stdout
 from gui_files.common_server import route, start
 
 import hog
+import hog_solver
 import dice
 import default_graphics
 
@@ -15,6 +16,9 @@ DEFAULT_SERVER = "https://hog.cs61a.org"
 GUI_FOLDER = "gui_files/"
 PATHS = {}
 
+# Loaded once from the on-disk cache so requests never re-solve the game.
+OPTIMAL_STRATEGY = hog_solver.optimal_strategy()
+
 
 class HogLoggingException(Exception):
     pass
@@ -89,6 +93,7 @@ def strategy(name, scores):
         "boar_strategy": hog.boar_strategy,
         "sus_strategy": hog.sus_strategy,
         "final_strategy": hog.final_strategy,
+        "optimal_strategy": OPTIMAL_STRATEGY,
     }
     return STRATEGIES[name](*scores[::-1])
 
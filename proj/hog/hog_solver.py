@@ -0,0 +1,123 @@
+"""Compute optimal Hog strategies and store them as compact tables.
+
+A strategy table is a bytes object of length goal * goal whose entry at
+score * goal + opponent_score is the number of dice to roll. Tables are
+solved once per rule set and cached on disk in CACHE_FOLDER.
+"""
+
+import os
+
+from hog import GOAL, boar_brawl, roll_dice_outcomes, sus_points
+
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategy_cache")
+CACHE_VERSION = 1  # Bump when the solver changes to invalidate cached tables.
+
+
+def solve_optimal_strategy(goal=GOAL, sus_fuss=True):
+    """Return a strategy table of the number of dice that maximizes the
+    current player's chance of winning from every state, assuming the
+    opponent also plays optimally.
+
+    >>> table = solve_optimal_strategy(goal=10)
+    >>> len(table)
+    100
+    >>> table[9 * 10 + 0]  # Boar Brawl wins outright, so roll no dice
+    0
+    """
+    if sus_fuss:
+        after_turn = [sus_points(score) for score in range(goal + 60)]
+    else:
+        after_turn = list(range(goal + 60))
+    outcomes_for = [None] + [roll_dice_outcomes(n) for n in range(1, 11)]
+    # win[score][opponent_score] is the chance that the player about to move wins.
+    win = [[0.0] * goal for _ in range(goal)]
+    table = bytearray(goal * goal)
+    for total in range(2 * goal - 2, -1, -1):
+        for score in range(max(0, total - goal + 1), min(total, goal - 1) + 1):
+            opponent_score = total - score
+            opponent_win = win[opponent_score]
+            best_rolls, best_chance = 0, -1.0
+            for num_rolls in range(11):
+                if num_rolls == 0:
+                    outcomes = [(boar_brawl(score, opponent_score), 1.0)]
+                else:
+                    outcomes = outcomes_for[num_rolls]
+                chance = 0.0
+                for points, p in outcomes:
+                    new_score = after_turn[score + points]
+                    if new_score >= goal:
+                        chance += p
+                    else:
+                        chance += p * (1 - opponent_win[new_score])
+                if chance > best_chance + 1e-12:
+                    best_rolls, best_chance = num_rolls, chance
+            win[score][opponent_score] = best_chance
+            table[score * goal + opponent_score] = best_rolls
+    return bytes(table)
+
+
+def cache_path(goal=GOAL, sus_fuss=True):
+    """Return the file that caches the optimal strategy table for a rule set."""
+    rules = "sus" if sus_fuss else "simple"
+    name = "optimal_v{0}_goal{1}_{2}.bin".format(CACHE_VERSION, goal, rules)
+    return os.path.join(CACHE_FOLDER, name)
+
+
+_optimal_tables = {}
+
+
+def optimal_strategy_table(goal=GOAL, sus_fuss=True):
+    """Return the optimal strategy table for a rule set, reading it from the
+    disk cache when possible and solving and caching it otherwise.
+    """
+    key = (goal, sus_fuss)
+    if key not in _optimal_tables:
+        path = cache_path(goal, sus_fuss)
+        try:
+            with open(path, "rb") as f:
+                table = f.read()
+        except OSError:
+            table = None
+        if table is None or len(table) != goal * goal:
+            table = solve_optimal_strategy(goal, sus_fuss)
+            try:
+                os.makedirs(CACHE_FOLDER, exist_ok=True)
+                tmp_path = path + ".tmp{0}".format(os.getpid())
+                with open(tmp_path, "wb") as f:
+                    f.write(table)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # The cache is only an optimization.
+        _optimal_tables[key] = table
+    return _optimal_tables[key]
+
+
+def make_table_strategy(table, goal=GOAL):
+    """Return a strategy that looks up the number of dice to roll in TABLE.
+
+    >>> strategy = make_table_strategy(bytes([3, 4, 5, 6]), goal=2)
+    >>> strategy(1, 0)
+    5
+    """
+    assert len(table) == goal * goal, "Table does not match goal."
+
+    def strategy(score, opponent_score):
+        return table[score * goal + opponent_score]
+
+    return strategy
+
+
+def strategy_to_table(strategy, goal=GOAL):
+    """Return the strategy table of STRATEGY, which must choose its number of
+    dice deterministically from the scores alone.
+
+    >>> strategy_to_table(lambda score, opponent_score: score + 2 * opponent_score, goal=2)
+    b'\\x00\\x02\\x01\\x03'
+    """
+    return bytes(strategy(score, opponent_score)
+                 for score in range(goal) for opponent_score in range(goal))
+
+
+def optimal_strategy(goal=GOAL, sus_fuss=True):
+    """Return the optimal strategy for a game to GOAL points."""
+    return make_table_strategy(optimal_strategy_table(goal, sus_fuss), goal)
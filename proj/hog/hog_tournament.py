@@ -0,0 +1,108 @@
+"""Play round-robin tournaments between Hog strategies on several processes.
+
+Strategies are named by a function in hog.py (final_strategy), by a
+module and function (hog:catch_up), or by a number of
+dice that is always rolled (4). A trailing "()" calls the named function
+with no arguments to build the strategy (hog_solver:optimal_strategy()).
+"""
+
+import importlib
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import hog
+from dice import make_seeded_dice
+
+
+def resolve_strategy(name):
+    """Return the strategy function called NAME.
+
+    >>> resolve_strategy("catch_up") is hog.catch_up
+    True
+    >>> resolve_strategy("3")(0, 0)
+    3
+    >>> resolve_strategy("always_roll_5")(0, 0)
+    5
+    """
+    if name.isdigit():
+        return hog.always_roll(int(name))
+    is_factory = name.endswith("()")
+    if is_factory:
+        name = name[:-2]
+    if ":" in name:
+        module_name, attr = name.split(":", 1)
+        strategy = getattr(importlib.import_module(module_name), attr)
+    else:
+        strategy = getattr(hog, name)
+    if is_factory:
+        strategy = strategy()
+    return strategy
+
+
+def play_games(name0, name1, num_games, seed):
+    """Play NUM_GAMES games of Hog between the strategies NAME0 and NAME1
+    with dice seeded by SEED and return the number that player 0 wins.
+    """
+    strategy0, strategy1 = resolve_strategy(name0), resolve_strategy(name1)
+    dice = make_seeded_dice(6, seed)
+    wins = 0
+    for _ in range(num_games):
+        score0, score1 = hog.play(strategy0, strategy1, hog.sus_update, dice=dice)
+        if score0 > score1:
+            wins += 1
+    return wins
+
+
+def run_tournament(names, num_games=1000, seed=0, max_workers=None):
+    """Play every pair of strategies in NAMES against each other NUM_GAMES
+    times as player 0 and NUM_GAMES times as player 1. Return a dictionary
+    with the strategy names, the matrix of win rates of each row strategy
+    against each column strategy, and the half-widths of their 95%
+    confidence intervals.
+    """
+    n = len(names)
+    wins = [[0] * n for _ in range(n)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for i in range(n):
+            for j in range(n):
+                if i != j:
+                    # Every pairing gets its own stream, so results do not
+                    # depend on how tasks are spread across workers.
+                    task_seed = "{0}:{1}:{2}".format(seed, i, j)
+                    future = executor.submit(play_games, names[i], names[j], num_games, task_seed)
+                    futures[future] = (i, j)
+        for future, (i, j) in futures.items():
+            player_0_wins = future.result()
+            wins[i][j] += player_0_wins
+            wins[j][i] += num_games - player_0_wins
+
+    total_games = 2 * num_games
+    win_rates = [[0.5] * n for _ in range(n)]
+    intervals = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                rate = wins[i][j] / total_games
+                win_rates[i][j] = rate
+                intervals[i][j] = 1.96 * math.sqrt(rate * (1 - rate) / total_games)
+    return {"strategies": list(names), "games": total_games,
+            "win_rates": win_rates, "intervals": intervals}
+
+
+def print_results(results):
+    """Print the win-rate matrix of tournament RESULTS."""
+    names = results["strategies"]
+    width = max(len(name) for name in names)
+    print(" " * width, *(str(j).rjust(13) for j in range(len(names))))
+    for i, name in enumerate(names):
+        cells = ["{0:.3f}±{1:.3f}".format(rate, interval).rjust(13)
+                 for rate, interval in zip(results["win_rates"][i], results["intervals"][i])]
+        print(name.ljust(width), *cells)
+
+
+def write_results(results, path):
+    """Write tournament RESULTS as JSON to PATH."""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)